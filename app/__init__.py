@@ -4,13 +4,13 @@ Defines application factory function.
 
 Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
 Created:    June, 2020
-Modified:   -
+Modified:   October, 2026
 
 """
 
 import os
 import logging
-from logging.handlers import SMTPHandler, RotatingFileHandler
+from logging.handlers import RotatingFileHandler
 
 from flask import Flask
 
@@ -18,50 +18,74 @@ from config import BaseConfig
 from .errors import error_templates
 from .extensions import db, admin, extensions
 from .commands import commands
-from .models import models
+from .models import models, role_registry, identity_cache
 from .blueprints import blueprints
-from .admin import AdminView
+from .admin import AdminView, QueryStatsView, ExportView
+from .search import search_index
+from .activity import last_seen
+from .outbox import outbox
+from .hashing import hasher
+from .pictures import pictures
+from .fragments import fragments
+from .tags import tag_cache
+from .sqlstats import query_stats
+from .conditional import templates_version
+from .live import live
+from .logs import AsyncHandler, JSONFormatter, RequestFilter, Sampler, ThrottledSMTPHandler
+from .feeds import feeds
 
 
 def logger(app):
     """
-    Configures, a file and mail handler. Note that this function
-    mutates the provided 'app' parameter.
+    Configures, a file and mail handler fed through a queue by a
+    background thread. Note that this function mutates the provided
+    'app' parameter.
 
     :param app: Flask application instance
     :return: None
     """
-    if app.config['MAIL_SERVER']:
+    config = app.config
+    handlers = []
+    if config['MAIL_SERVER']:
         auth = None
-        if app.config['MAIL_USERNAME'] and app.config['MAIL_PASSWORD']:
-            auth = (app.config['MAIL_USERNAME'], app.config['MAIL_PASSWORD'])
+        if config['MAIL_USERNAME'] and config['MAIL_PASSWORD']:
+            auth = (config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
 
         secure = None
-        if app.config['MAIL_USE_TLS']:
+        if config['MAIL_USE_TLS']:
             secure = ()
 
-        mail_handler = SMTPHandler(
-            mailhost=(app.config['MAIL_SERVER'], app.config['MAIL_PORT']),
-            fromaddr=app.config['MAIL_USERNAME'] + '@' + app.config['MAIL_SERVER'],
-            toaddrs=app.config['ADMIN_EMAIL'], subject='Educatia Failure',
-            credentials=auth, secure=secure
+        mail_handler = ThrottledSMTPHandler(
+            mailhost=(config['MAIL_SERVER'], config['MAIL_PORT']),
+            fromaddr=config['MAIL_USERNAME'] + '@' + config['MAIL_SERVER'],
+            toaddrs=config['ADMIN_EMAIL'], subject='Educatia Failure',
+            credentials=auth, secure=secure,
+            interval=config['LOGGING_MAIL_INTERVAL'],
+            per_hour=config['LOGGING_MAIL_PER_HOUR']
         )
         mail_handler.setLevel(logging.ERROR)
-        app.logger.addHandler(mail_handler)
-
-    if not os.path.exists('logs'):
-        os.mkdir('logs')
+        mail_handler.setFormatter(logging.Formatter(config['LOGGING_FORMAT']))
+        handlers.append(mail_handler)
 
+    os.makedirs(os.path.dirname(config['LOGGING_LOCATION']), exist_ok=True)
     file_handler = RotatingFileHandler(
-        app.config['LOGGING_LOCATION'],
-        maxBytes=10240,
-        backupCount=10
+        config['LOGGING_LOCATION'],
+        maxBytes=config['LOGGING_MAX_BYTES'],
+        backupCount=config['LOGGING_BACKUP_COUNT']
     )
-    file_handler.setLevel(app.config['LOGGING_LEVEL'])
-    file_handler.setFormatter(logging.Formatter(app.config['LOGGING_FORMAT']))
-
-    app.logger.addHandler(file_handler)
-    app.logger.setLevel(app.config['LOGGING_LEVEL'])
+    file_handler.setLevel(config['LOGGING_LEVEL'])
+    if config['LOGGING_JSON']:
+        file_handler.setFormatter(JSONFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(config['LOGGING_FORMAT']))
+    handlers.append(file_handler)
+
+    queue_handler = AsyncHandler(handlers, config['LOGGING_QUEUE_SIZE'])
+    queue_handler.addFilter(Sampler(config['LOGGING_DEBUG_SAMPLE']))
+    queue_handler.addFilter(RequestFilter())
+
+    app.logger.addHandler(queue_handler)
+    app.logger.setLevel(config['LOGGING_LEVEL'])
     app.logger.info('Educatia startup')
 
 
@@ -77,6 +101,7 @@ def create_app(config_cls=BaseConfig):
 
     app = Flask(__name__)
     app.config.from_object(config_cls)
+    app.config.setdefault('TEMPLATES_VERSION', templates_version(app))
 
     error_templates(app)
 
@@ -85,12 +110,26 @@ def create_app(config_cls=BaseConfig):
 
     for extension in extensions:
         extension.init_app(app)
+    search_index.init_app(app)
+    role_registry.init_app(app)
+    identity_cache.init_app(app)
+    last_seen.init_app(app)
+    outbox.init_app(app)
+    hasher.init_app(app)
+    pictures.init_app(app)
+    fragments.init_app(app)
+    tag_cache.init_app(app)
+    query_stats.init_app(app)
+    live.init_app(app)
+    feeds.init_app(app)
 
     for command in commands:
         app.cli.add_command(command)
 
     for model in models:
         admin.add_view(AdminView(model, db.session))
+    admin.add_view(QueryStatsView(name='SQL', endpoint='sql_stats'))
+    admin.add_view(ExportView(name='Export', endpoint='export'))
 
     for blueprint in blueprints:
         app.register_blueprint(blueprint)
@@ -0,0 +1,102 @@
+"""
+
+Records when authenticated users were last seen without writing on
+every request.
+
+Timestamps are buffered in memory and written by a background thread in
+a single bulk UPDATE every 'LAST_SEEN_FLUSH_INTERVAL' seconds, or as soon
+as 'LAST_SEEN_FLUSH_SIZE' users are pending, and once more at shutdown.
+'User.last_seen' therefore lags behind by up to the flush interval.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import atexit
+import threading
+from datetime import datetime
+
+from flask import request, current_app
+from flask_login import current_user
+from sqlalchemy import bindparam
+
+from .extensions import db, PerProcess
+from .models import User
+
+
+class _Buffer:
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config['LAST_SEEN_FLUSH_INTERVAL']
+        self.size = app.config['LAST_SEEN_FLUSH_SIZE']
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.writer = PerProcess(self._start)
+
+    def touch(self, user_id: int, when: datetime) -> None:
+        with self.lock:
+            self.pending[user_id] = when
+            full = len(self.pending) >= self.size
+        self.writer.ensure()
+        if full:
+            self.wakeup.set()
+
+    def _start(self) -> None:
+        threading.Thread(target=self._run, name='last-seen-writer', daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Writes the pending timestamps in one statement, returns their count."""
+
+        with self.lock:
+            rows, self.pending = self.pending, {}
+        if not rows:
+            return 0
+
+        table = User.__table__
+        statement = table.update().where(
+            table.c.id == bindparam('user_id')).values(
+                last_seen=bindparam('seen'))
+        try:
+            with db.get_engine(self.app).begin() as connection:
+                connection.execute(statement, [
+                    {'user_id': user_id, 'seen': seen} for user_id, seen in rows.items()
+                ])
+        except Exception:
+            self.app.logger.exception('Could not write the last seen timestamps')
+            with self.lock:
+                for user_id, seen in rows.items():
+                    self.pending.setdefault(user_id, seen)
+            return 0
+        return len(rows)
+
+
+class LastSeen:
+    """Flask extension buffering 'User.last_seen' updates of every blueprint."""
+
+    def init_app(self, app):
+        app.config.setdefault('LAST_SEEN_FLUSH_INTERVAL', 60)
+        app.config.setdefault('LAST_SEEN_FLUSH_SIZE', 500)
+        buffer = _Buffer(app)
+        app.extensions['last_seen'] = buffer
+        app.before_request(self._touch)
+        atexit.register(buffer.flush)
+
+    @staticmethod
+    def _touch():
+        if request.endpoint != 'static' and current_user.is_authenticated:
+            current_app.extensions['last_seen'].touch(current_user.id, datetime.now())
+
+    def flush(self) -> int:
+        return current_app.extensions['last_seen'].flush()
+
+
+last_seen = LastSeen()
@@ -4,12 +4,10 @@ Creates the 'auth' blueprint, and define its endpoints.
 
 Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
 Created:    June, 2020
-Modified:   -
+Modified:   October, 2026
 
 """
 
-from threading import Thread
-
 from flask_mail import Message
 from flask import (render_template, current_app, url_for, flash,
                    redirect, request, Blueprint)
@@ -17,26 +15,22 @@ from werkzeug.urls import url_parse
 from flask_login import login_user, current_user, logout_user
 
 from .forms import RegistrationForm, LoginForm, RequestResetForm, ResetPasswordForm
-from app.extensions import db, mail
-from app.models import User, Role
+from app.extensions import db
+from app.outbox import outbox
+from app.hashing import hasher
+from app.models import User, Role, identity_cache
 
 auth = Blueprint('auth', __name__)
 
 
-def send_async_email(app, msg):
-    with app.app_context():
-        mail.send(msg)
-
-
 def send_token(user, subject, template):
-    app = current_app._get_current_object()
     msg = Message(
         subject,
         sender=current_app.config['MAIL_USERNAME'],
         recipients=[user.email],
         html=render_template(template, token=user.generate_token())
     )
-    Thread(target=send_async_email, args=(app, msg)).start()
+    outbox.send(msg)
 
 
 @auth.route('/register', methods=['GET', 'POST'])
@@ -78,6 +72,7 @@ def activate_account(token: str):
     user.roles.append(Role.query.filter_by(name='Student').first())
     db.session.add(user)
     db.session.commit()
+    identity_cache.invalidate(user.id)
     flash(f'Your account has been activated', 'success')
     return redirect(url_for('auth.login'))
 
@@ -91,6 +86,9 @@ def login():
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
         if user and user.verify_password(form.password.data):
+            if hasher.needs_rehash(user.password_hash):
+                user.password = form.password.data
+                db.session.commit()
             login_user(user, remember=form.remember.data)
             next_page = request.args.get('next')
             if next_page is None or url_parse(next_page).netloc != '':
@@ -147,6 +145,7 @@ def reset_password(token: str):
     if form.validate_on_submit():
         user.password = form.password.data
         db.session.commit()
+        identity_cache.invalidate(user.id)
         flash('Your password has been changed. You are now able to sign in', 'success')
         return redirect(url_for('auth.login'))
 
@@ -1,9 +1,117 @@
+import json
+import binascii
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
+from typing import Optional, Tuple
+
+from flask import current_app, request
+from sqlalchemy import and_, case, or_
+from sqlalchemy.orm import defer, joinedload, selectinload, with_expression
+
 from app.models import Post
+from app.search import search_index
+
+
+def eager(posts):
+    """
+    Loads what a listing renders along with the 'posts': their authors in
+    the same query and their tags in a single extra IN query, instead of
+    two lazy loads per post. Listings show excerpts, so the content of
+    the posts is only read for those without one yet, in the same query.
+    """
+
+    return posts.options(joinedload(Post.author), selectinload(Post.tags),
+                         defer(Post.content), defer(Post.content_html),
+                         with_expression(Post.unexcerpted, case([(Post.excerpt.is_(None), Post.content)])))
+
+
+def paginate(page, posts, per_page=5, key=(Post.date, Post.id), error_out=True):
+    date, ident = key
+    posts = eager(posts)
+    return posts.order_by(date.desc(), ident.desc()).paginate(
+        page=page, per_page=per_page, error_out=error_out)
+
+
+def encode_cursor(date: datetime, ident: int) -> str:
+    data = json.dumps([date.isoformat(), ident]).encode('utf-8')
+    return urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Decodes an '?after=' or '?before=' token, ignoring malformed ones."""
+
+    if not token:
+        return None
+    try:
+        data = urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        date, ident = json.loads(data)
+        return datetime.fromisoformat(date), int(ident)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+
+
+class KeysetPagination:
+    """
+    A page of posts found by seeking to a '(date, id)' cursor instead of
+    skipping rows with an OFFSET, so every page costs the same and no
+    COUNT(*) is issued. Unlike Flask-SQLAlchemy's 'Pagination' it only
+    knows about its neighbours, hence 'total' is None.
+    """
+
+    keyset = True
+    total = None
+
+    def __init__(self, items, has_prev, has_next):
+        self.items = items
+        self.has_prev = has_prev
+        self.has_next = has_next
+        self.prev_cursor = encode_cursor(items[0].date, items[0].id) if has_prev and items else None
+        self.next_cursor = encode_cursor(items[-1].date, items[-1].id) if has_next and items else None
+
+
+def seek(posts, after=None, before=None, per_page=5, key=(Post.date, Post.id)):
+    """
+    Paginates the 'posts' newest first, starting right after the 'after'
+    cursor or ending right before the 'before' cursor.
+
+    :param key: The columns holding the date and the id of the posts to
+                order by; they must be backed by a composite index for
+                seeking to pay off
+    """
+
+    date, ident = key
+    posts = eager(posts)
+    if cursor := decode_cursor(before):
+        posts = posts.filter(or_(date > cursor[0], and_(date == cursor[0], ident > cursor[1])))
+        rows = posts.order_by(date.asc(), ident.asc()).limit(per_page + 1).all()
+        items = rows[:per_page][::-1]
+        return KeysetPagination(items, len(rows) > per_page, True)
+
+    cursor = decode_cursor(after)
+    if cursor:
+        posts = posts.filter(or_(date < cursor[0], and_(date == cursor[0], ident < cursor[1])))
+    rows = posts.order_by(date.desc(), ident.desc()).limit(per_page + 1).all()
+    return KeysetPagination(rows[:per_page], cursor is not None, len(rows) > per_page)
+
+
+def listing(posts, query=None, per_page=5, key=(Post.date, Post.id), scoped=True):
+    """
+    Paginates the 'posts' of a listing endpoint as the request asks for.
+
+    Search results are ordered by relevance, so they always use offset
+    pagination. Everything else is seeked when the request carries a
+    cursor or when 'PAGINATION_MODE' is 'keyset'. Pass 'scoped' as False
+    for the listing of every post, see 'search_index.filter'.
+    """
 
+    if query:
+        return paginate(request.args.get('page', 1, type=int), search(posts, query, scoped), per_page)
 
-def paginate(page, posts, per_page=5):
-    return posts.order_by(Post.date.desc()).paginate(page=page, per_page=per_page)
+    after, before = request.args.get('after'), request.args.get('before')
+    if after or before or current_app.config['PAGINATION_MODE'] == 'keyset':
+        return seek(posts, after, before, per_page, key)
+    return paginate(request.args.get('page', 1, type=int), posts, per_page, key)
 
 
-def search(posts, query: str):
-    return posts.filter(Post.title.contains(query) | Post.content.contains(query))
+def search(posts, query: str, scoped: bool = True):
+    return search_index.filter(posts, query, scoped)
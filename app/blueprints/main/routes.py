@@ -4,37 +4,101 @@ Creates the 'main' blueprint, and define its endpoints.
 
 Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
 Created:    June, 2020
-Modified:   -
+Modified:   October, 2026
 
 """
 
-from flask import render_template, request, Blueprint
+from typing import Optional, Tuple
+
+from flask import (render_template, request, Blueprint, Response,
+                   current_app, jsonify, stream_with_context, url_for)
 from flask_login import current_user, login_required
 
-from .navigation_tools import paginate, search
+from .navigation_tools import listing, encode_cursor
 from app.models import Post
+from app import timeline
+from app.conditional import conditional, listing_validators
+from app.live import live, high_water_mark
+from app.feeds import feeds, EVERYONE
 
 main = Blueprint('main', __name__)
 
 
+def live_feed(posts, endpoint: str):
+    """The URLs, the high-water mark and the top of a listing's new posts, on its first page only."""
+
+    if request.args.get('query') or posts.has_prev:
+        return None
+    return {
+        'last': high_water_mark(posts.items),
+        'top': encode_cursor(posts.items[0].date, posts.items[0].id) if posts.items else '',
+        'poll': url_for(f'main.{endpoint}_updates'),
+        'stream': url_for(f'main.{endpoint}_stream') if current_app.config['LIVE_SSE_ENABLED'] else None,
+        'interval': current_app.config['LIVE_POLL_INTERVAL']
+    }
+
+
+def marks() -> Tuple[Optional[int], Optional[str]]:
+    # an EventSource resuming after a disconnection sends the last event id, 'last:top'
+    last, _, top = request.headers.get('Last-Event-ID', '').partition(':')
+    if last.isdigit():
+        return int(last), top or None
+    return request.args.get('since', type=int), request.args.get('top') or None
+
+
+def event_stream(posts, key):
+    since, top = marks()
+    events = live.stream(posts, key, since or 0, top)
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
 @main.route('/')
 @main.route('/index')
 def index():
-    page = request.args.get('page', 1, type=int)
-    posts = Post.query
-    if query := request.args.get('query'):
-        posts = search(posts, query)
-    return render_template('main/index.html', posts=paginate(page, posts))
+    posts = listing(Post.query, request.args.get('query'), scoped=False)
+    if response := conditional(listing_validators(posts)):
+        return response
+    return render_template('main/index.html', posts=posts, live=live_feed(posts, 'index'))
+
+
+@main.route('/index/updates')
+def index_updates():
+    return jsonify(live.updates(Post.query, (Post.date, Post.id), *marks()))
+
+
+@main.route('/index/stream')
+def index_stream():
+    return event_stream(Post.query, (Post.date, Post.id))
 
 
 @main.route('/home')
 @login_required
 def home():
-    page = request.args.get('page', 1, type=int)
-    posts = current_user.followed_posts()
-    if query := request.args.get('query'):
-        posts = search(posts, query)
-    return render_template('main/home.html', posts=paginate(page, posts))
+    posts, key = timeline.home(current_user)
+    posts = listing(posts, request.args.get('query'), key=key)
+    if response := conditional(listing_validators(posts)):
+        return response
+    return render_template('main/home.html', posts=posts, live=live_feed(posts, 'home'))
+
+
+@main.route('/home/updates')
+@login_required
+def home_updates():
+    return jsonify(live.updates(*timeline.home(current_user), *marks()))
+
+
+@main.route('/home/stream')
+@login_required
+def home_stream():
+    return event_stream(*timeline.home(current_user))
+
+
+@main.route('/feed.atom')
+def feed():
+    return feeds.response(EVERYONE, Post.query, 'Latest posts', url_for('main.index', _external=True))
 
 
 @main.route('/about')
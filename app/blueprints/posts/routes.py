@@ -4,20 +4,30 @@ Creates the 'posts' blueprint, and define its endpoints.
 
 Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
 Created:    June, 2020
-Modified:   -
+Modified:   October, 2026
 
 """
 
-from typing import Iterable
+from datetime import datetime
+from typing import List
 
-from flask import (render_template, url_for, flash,
-                   redirect, request, abort, Blueprint)
+from flask import (render_template, url_for, flash, redirect,
+                   request, abort, Blueprint, Response, current_app)
+from pygments import __version__ as pygments_version
 from flask_login import current_user, login_required
 
 from .forms import PostForm
-from ..main.navigation_tools import paginate
+from ..main.navigation_tools import listing
 from app.extensions import db
 from app.models import Post, Tag
+from app.search import search_index
+from app.fragments import PAGE, fragments, markup_version
+from app.tags import find_or_create
+from app import timeline
+from app.conditional import conditional, listing_validators
+from app.live import live
+from app.feeds import feeds, tag_key
+from app.rendering import excerpt, highlight, highlight_css
 
 posts = Blueprint('posts', __name__)
 
@@ -25,23 +35,46 @@ posts = Blueprint('posts', __name__)
 @posts.route('/posts/<int:post_id>')
 def post(post_id: int):
     post = Post.query.get_or_404(post_id)
+    validators = (post.id, post.updated_at, markup_version(post, PAGE),
+                  post.author.username, post.author.image_file, [tag.name for tag in post.tags])
+    if response := conditional(validators):
+        return response
     return render_template('posts/post.html', post=post, title=post.title)
 
 
 @posts.route('/tags/<int:tag_id>')
 def tag(tag_id: int):
-    page = request.args.get('page', 1, type=int)
     tag = Tag.query.get_or_404(tag_id)
-    return render_template('main/index.html', posts=paginate(page, tag.posts))
+    posts = listing(tag.posts)
+    if response := conditional(listing_validators(posts)):
+        return response
+    return render_template('main/index.html', posts=posts,
+                           feed_url=url_for('posts.tag_feed', tag_id=tag_id))
 
 
-def make_tags(data: str, delimiter: str = ',') -> Iterable[Tag]:
-    tags = map(lambda name: name.strip(), data.split(delimiter))
-    for name in tags:
-        if tag := Tag.query.filter_by(name=name).first():
-            yield tag
-        else:
-            yield Tag(name=name)
+@posts.route('/tags/<int:tag_id>/feed.atom')
+def tag_feed(tag_id: int):
+    tag = Tag.query.get_or_404(tag_id)
+    return feeds.response(tag_key(tag.id), tag.posts, f'Posts tagged {tag.name}',
+                          url_for('posts.tag', tag_id=tag.id, _external=True))
+
+
+@posts.route('/code-theme.css')
+def code_theme():
+    # the URL changes along with the stylesheet, see 'code_theme_url'
+    response = Response(highlight_css(current_app.config['HIGHLIGHT_STYLE']), mimetype='text/css')
+    response.cache_control.public = True
+    response.cache_control.max_age = 365 * 24 * 3600
+    return response
+
+
+@posts.app_template_global()
+def code_theme_url() -> str:
+    return url_for('posts.code_theme', v=f'{current_app.config["HIGHLIGHT_STYLE"]}-{pygments_version}')
+
+
+def make_tags(data: str, delimiter: str = ',') -> List[Tag]:
+    return find_or_create((data or '').split(delimiter))
 
 
 @posts.route('/posts/create', methods=['GET', 'POST'])
@@ -52,14 +85,20 @@ def create_post():
         post = Post(
             title=form.title.data,
             content=form.content.data,
+            excerpt=excerpt(form.content.data),
+            content_html=highlight(form.content.data),
             author=current_user
         )
-        tags = [tag for tag in make_tags(form.tags.data)]
-        post.tags.extend(tags)
-
-        db.session.add_all(tags)
+        post.tags.extend(make_tags(form.tags.data))
         db.session.add(post)
+        current_user.count_post()
+        db.session.flush()
+        search_index.add(post)
+        timeline.fan_out(post)
+        post_id, tag_ids = post.id, [tag.id for tag in post.tags]
         db.session.commit()
+        live.publish(post_id)
+        feeds.invalidate_post(current_user.id, tag_ids)
         flash('Your posts has been created', 'success')
         return redirect(url_for('main.home'))
 
@@ -81,9 +120,19 @@ def update_post(post_id: int):
     if form.validate_on_submit():
         post.title = form.title.data
         post.content = form.content.data
+        post.excerpt = excerpt(post.content)
+        post.content_html = highlight(post.content)
+        tag_ids = {tag.id for tag in post.tags}
         post.tags.clear()
-        post.tags.extend(tag for tag in make_tags(form.tags.data))
+        post.tags.extend(make_tags(form.tags.data))
+        # tags alone would not bump the version of the post's fragments
+        post.updated_at = datetime.now()
+        search_index.add(post)
+        db.session.flush()
+        tag_ids.update(tag.id for tag in post.tags)
         db.session.commit()
+        fragments.invalidate([post_id])
+        feeds.invalidate_post(current_user.id, tag_ids)
         flash('Your posts has been updated', 'success')
         return redirect(url_for('posts.post', post_id=post_id))
     elif request.method == 'GET':
@@ -105,7 +154,13 @@ def delete_post(post_id: int):
     post = Post.query.get_or_404(post_id)
     if post.author != current_user:
         abort(403)
+    search_index.remove(post)
+    timeline.retract(post)
+    tag_ids = [tag.id for tag in post.tags]
+    post.author.count_post(-1)
     db.session.delete(post)
     db.session.commit()
+    fragments.invalidate([post_id])
+    feeds.invalidate_post(current_user.id, tag_ids)
     flash('Your posts has been deleted', 'success')
     return redirect(url_for('main.home'))
@@ -4,62 +4,27 @@ Creates the 'users' blueprint, and define its endpoints.
 
 Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
 Created:    June, 2020
-Modified:   -
+Modified:   October, 2026
 
 """
 
-import os
-import secrets
-from functools import partial
-from datetime import datetime
-
-from PIL import Image
-from flask import (render_template, current_app, url_for, flash,
+from flask import (render_template, url_for, flash,
                    redirect, request, Blueprint)
 from flask_login import current_user, login_required
 
 from .forms import UpdateProfileForm, EmptyForm
-from ..main.navigation_tools import paginate
+from ..main.navigation_tools import listing
 from app.extensions import db
-from app.models import User, Post
+from app.models import User, Post, identity_cache
+from app.pictures import pictures
+from app.fragments import fragments
+from app import timeline
+from app.conditional import conditional, listing_validators
+from app.feeds import feeds, user_key
 
 users = Blueprint('users', __name__)
 
 
-@users.before_request
-def before_request():
-    if current_user.is_authenticated:
-        current_user.last_seen = datetime.now()
-        db.session.commit()
-
-
-def change_profile_picture(picture) -> str:
-    picture_path = partial(
-        os.path.join,
-        current_app.root_path,
-        'static/images/profile_pics'
-    )
-    if current_user.image_file != 'default.jpg':
-        os.remove(picture_path(current_user.image_file))
-
-    random_hex = secrets.token_hex(16)
-    _, file_ext = os.path.splitext(picture.filename)
-    picture_filename = random_hex + file_ext
-
-    output_size = (125, 125)
-    image = Image.open(picture)
-    image.thumbnail(output_size)
-    image.save(picture_path(picture_filename))
-    return picture_filename
-
-
-def image_file(user: User):
-    return url_for(
-        'static',
-        filename=f'images/profile_pics/{user.image_file}'
-    )
-
-
 @users.route('/users/<string:username>')
 def user(username: str):
     form = EmptyForm()
@@ -72,8 +37,7 @@ def user(username: str):
 
     context = {
         'form': form,
-        'user': user,
-        'image_file': image_file(user)
+        'user': user
     }
     return render_template('users/user.html', **context)
 
@@ -84,12 +48,16 @@ def profile():
     form = UpdateProfileForm()
     if form.validate_on_submit():
         if form.picture.data:
-            picture_filename = change_profile_picture(form.picture.data)
-            current_user.image_file = picture_filename
+            pictures.submit(current_user, form.picture.data)
+            flash('Your new picture will show up in a moment', 'info')
         current_user.username = form.username.data
         current_user.about_me = form.about_me.data
         current_user.email = form.email.data
         db.session.commit()
+        identity_cache.invalidate(current_user.id)
+        fragments.invalidate_author(current_user.id)
+        # the author's name shows in every feed
+        feeds.cache.clear()
         flash('Your profile has been updated', 'success')
         return redirect(url_for('users.profile'))
     elif request.method == 'GET':
@@ -99,8 +67,7 @@ def profile():
 
     context = {
         'form': form,
-        'title': 'Profile',
-        'image_file': image_file(current_user)
+        'title': 'Profile'
     }
     return render_template('users/profile.html', **context)
 
@@ -112,6 +79,8 @@ def follow(username: str):
     if form.validate_on_submit():
         user = User.query.filter_by(username=username).first()
         current_user.follow(user)
+        db.session.flush()
+        timeline.follow(current_user, user)
         db.session.commit()
         flash(f'You are following {username}', 'success')
         return redirect(url_for('users.user', username=username))
@@ -126,6 +95,8 @@ def unfollow(username: str):
     if form.validate_on_submit():
         user = User.query.filter_by(username=username).first()
         current_user.unfollow(user)
+        db.session.flush()
+        timeline.unfollow(current_user, user)
         db.session.commit()
         flash(f'You are not following {username}', 'success')
         return redirect(url_for('users.user', username=username))
@@ -135,11 +106,22 @@ def unfollow(username: str):
 
 @users.route('/users/<string:username>/posts')
 def user_posts(username: str):
-    page = request.args.get('page', 1, type=int)
     user = User.query.filter_by(username=username).first_or_404()
+    posts = listing(Post.query.filter_by(author=user))
+    if response := conditional((user.username, listing_validators(posts))):
+        return response
 
     context = {
         'user': user,
-        'posts': paginate(page, Post.query.filter_by(author=user)),
+        'posts': posts,
+        'feed_url': url_for('users.user_posts_feed', username=user.username)
     }
     return render_template('users/user_posts.html', **context)
+
+
+@users.route('/users/<string:username>/feed.atom')
+def user_posts_feed(username: str):
+    user = User.query.filter_by(username=username).first_or_404()
+    return feeds.response(user_key(user.id), Post.query.filter_by(user_id=user.id),
+                          f'Posts by {user.username}',
+                          url_for('users.user_posts', username=user.username, _external=True))
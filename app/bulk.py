@@ -0,0 +1,284 @@
+"""
+
+Loads users, tags, posts and follows in bulk, read from NDJSON or
+generated. Every line of NDJSON is one record:
+
+    {"type": "user", "username": "ann", "email": "ann@example.com", "about_me": "..."}
+    {"type": "tag", "name": "python"}
+    {"type": "post", "author": "ann", "title": "...", "content": "<p>...</p>",
+     "date": "2020-06-18T22:39:27", "tags": ["python", "flask"]}
+    {"type": "follow", "follower": "ann", "followed": "bob"}
+
+Rows are written by Core INSERTs of a whole batch each, so neither ORM
+objects nor their events are involved, and the loader allocates the ids
+itself so posts need not be read back to tag them. Users without a
+'password_hash' share one hash computed beforehand. Users and tags are
+referred to by name, tag names are normalized as in 'Tag.normalize';
+names loaded earlier are resolved with IN queries.
+Run it while nothing else writes to the database.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .models import User, Post, Tag, Followers, PostTag, recount_users
+from .rendering import excerpt, highlight
+
+TYPES = ('user', 'tag', 'post', 'follow')
+VOCABULARY = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do '
+              'eiusmod tempor incididunt ut labore et dolore magna aliqua').split()
+
+
+def insert_ignore(table, rows: List[dict]) -> None:
+    """Inserts rows, skipping the ones violating a unique constraint."""
+
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        db.session.execute(insert(table).on_conflict_do_nothing(), rows)
+    elif dialect == 'sqlite':
+        db.session.execute(table.insert().prefix_with('OR IGNORE'), rows)
+    elif dialect == 'mysql':
+        db.session.execute(table.insert().prefix_with('IGNORE'), rows)
+    else:
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert(), row)
+            except IntegrityError:
+                pass
+
+
+class BulkLoader:
+    """
+    Buffers records and writes them a batch at a time, committing after
+    every batch. Call 'finish' once all the records were added.
+
+    :param password_hash: The hash given to users having none
+    :param batch:         Rows per INSERT
+    """
+
+    def __init__(self, password_hash: str, batch: int = 10000):
+        self.password_hash = password_hash
+        self.batch = batch
+        self.pending = {kind: [] for kind in TYPES}
+        self.users: Dict[str, int] = {}
+        self.tags: Dict[str, int] = {}
+        self.next_id = {
+            model: (db.session.query(sa.func.max(model.id)).scalar() or 0) + 1
+            for model in (User, Tag, Post)
+        }
+        self.counts = {kind: 0 for kind in TYPES}
+        self.skipped = 0
+
+    def add(self, record: dict) -> None:
+        kind = record.get('type')
+        if kind not in self.pending:
+            self.skipped += 1
+            return
+        self.pending[kind].append(record)
+        if len(self.pending[kind]) >= self.batch:
+            self.flush()
+
+    def load(self, records: Iterable[dict]) -> None:
+        for record in records:
+            self.add(record)
+
+    def _allocate(self, model) -> int:
+        ident = self.next_id[model]
+        self.next_id[model] += 1
+        return ident
+
+    def _resolve(self, model, column, names: Iterable[str], known: Dict[str, int]) -> None:
+        """Looks up in the database the ids of the names not known yet."""
+
+        missing = list({name for name in names if name not in known})
+        for offset in range(0, len(missing), 500):
+            chunk = missing[offset:offset + 500]
+            known.update(db.session.query(column, model.id).filter(column.in_(chunk)))
+
+    def _flush_users(self) -> None:
+        records, self.pending['user'] = self.pending['user'], []
+        self._resolve(User, User.username, (record['username'] for record in records), self.users)
+        rows = []
+        for record in records:
+            if record['username'] in self.users:
+                self.skipped += 1
+                continue
+            user_id = self.users[record['username']] = self._allocate(User)
+            rows.append({
+                'id': user_id,
+                'username': record['username'],
+                'email': record['email'],
+                'image_file': record.get('image_file') or 'default.jpg',
+                'password_hash': record.get('password_hash') or self.password_hash,
+                'about_me': record.get('about_me')
+            })
+        if rows:
+            db.session.execute(User.__table__.insert(), rows)
+        self.counts['user'] += len(rows)
+
+    def _flush_tags(self, names: Iterable[str]) -> None:
+        names = [name for name in dict.fromkeys(map(Tag.normalize, names)) if name]
+        self._resolve(Tag, Tag.name, names, self.tags)
+        rows = []
+        for name in names:
+            if name not in self.tags:
+                self.tags[name] = self._allocate(Tag)
+                rows.append({'id': self.tags[name], 'name': name})
+        if rows:
+            db.session.execute(Tag.__table__.insert(), rows)
+        self.counts['tag'] += len(rows)
+
+    def _flush_posts(self) -> None:
+        records, self.pending['post'] = self.pending['post'], []
+        self._resolve(User, User.username, (record['author'] for record in records), self.users)
+        self._flush_tags(name for record in records for name in record.get('tags', ()))
+
+        posts, tags = [], []
+        for record in records:
+            author = self.users.get(record['author'])
+            if author is None:
+                self.skipped += 1
+                continue
+            date = datetime.fromisoformat(record['date']) if record.get('date') else datetime.now()
+            post_id = self._allocate(Post)
+            posts.append({
+                'id': post_id,
+                'title': record['title'],
+                'content': record['content'],
+                'excerpt': excerpt(record['content']),
+                'content_html': highlight(record['content']),
+                'date': date,
+                'updated_at': date,
+                'user_id': author
+            })
+            tags.extend({'post_id': post_id, 'tag_id': self.tags[name]}
+                        for name in dict.fromkeys(map(Tag.normalize, record.get('tags', ()))) if name)
+        if posts:
+            db.session.execute(Post.__table__.insert(), posts)
+        if tags:
+            db.session.execute(PostTag.insert(), tags)
+        self.counts['post'] += len(posts)
+
+    def _flush_follows(self) -> None:
+        records, self.pending['follow'] = self.pending['follow'], []
+        names = (name for record in records for name in (record['follower'], record['followed']))
+        self._resolve(User, User.username, names, self.users)
+        pairs = {}
+        for record in records:
+            follower, followed = self.users.get(record['follower']), self.users.get(record['followed'])
+            if follower is None or followed is None or follower == followed or (follower, followed) in pairs:
+                self.skipped += 1
+                continue
+            pairs[follower, followed] = {'follower_id': follower, 'followed_id': followed}
+        rows = list(pairs.values())
+        insert_ignore(Followers, rows)
+        self.counts['follow'] += len(rows)
+
+    def flush(self) -> None:
+        """Writes every buffered record, the ones referred to first."""
+
+        self._flush_users()
+        self._flush_tags(record['name'] for record in self.pending['tag'])
+        self.pending['tag'] = []
+        self._flush_posts()
+        self._flush_follows()
+        db.session.commit()
+
+    def finish(self) -> Dict[str, int]:
+        """
+        Writes the remaining records and recounts the users' counters.
+
+        :return: The number of rows written per record type
+        """
+
+        self.flush()
+        db.session.execute(recount_users())
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # the ids were given explicitly, move the sequences past them
+            for model in (User, Tag, Post):
+                table = model.__tablename__
+                db.session.execute(sa.text(
+                    f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                    f"(SELECT coalesce(max(id), 1) FROM \"{table}\"))"
+                ))
+        db.session.commit()
+        return self.counts
+
+
+def read_ndjson(file: TextIO) -> Iterator[dict]:
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+class Zipf:
+    """Draws ids in 1..population, the id of rank k with a weight of 1/k."""
+
+    def __init__(self, population: int):
+        self.ids = range(1, population + 1)
+        self.weights = list(accumulate(1 / rank for rank in self.ids))
+
+    def sample(self, rng: random.Random, count: int) -> List[int]:
+        """Draws 'count' distinct ids, at most the whole population."""
+
+        picked = set()
+        count = min(count, len(self.ids))
+        while len(picked) < count:
+            picked.update(rng.choices(self.ids, cum_weights=self.weights, k=count - len(picked)))
+        return sorted(picked)
+
+
+def words(rng: random.Random, count: int) -> str:
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(count))
+
+
+def synthetic(users: int, posts: int, tags: int, following: int,
+              tags_per_post: int = 3, rng: Optional[random.Random] = None) -> Iterator[dict]:
+    """
+    Generates the records of a synthetic dataset: users named 'user<n>',
+    tags 'tag<n>', and follows, authors and tags drawn from a Zipf
+    distribution, so a few users and tags dominate.
+
+    :param following: How many users each user follows
+    """
+
+    rng = rng or random.Random(0)
+    popular_users, popular_tags = Zipf(users), Zipf(tags)
+
+    for number in range(1, users + 1):
+        yield {'type': 'user', 'username': f'user{number}', 'email': f'user{number}@example.com'}
+    for number in range(1, tags + 1):
+        yield {'type': 'tag', 'name': f'tag{number}'}
+
+    start = datetime.now()
+    for number in range(posts):
+        yield {
+            'type': 'post',
+            'author': f'user{popular_users.sample(rng, 1)[0]}',
+            'title': words(rng, 6),
+            'content': f'<p>{words(rng, 80)}</p>',
+            'date': (start - timedelta(minutes=number)).isoformat(),
+            'tags': [f'tag{tag_id}' for tag_id in popular_tags.sample(rng, tags_per_post)]
+        }
+
+    for follower in range(1, users + 1):
+        followed = [user_id for user_id in popular_users.sample(rng, following + 1)
+                    if user_id != follower][:following]
+        for user_id in followed:
+            yield {'type': 'follow', 'follower': f'user{follower}', 'followed': f'user{user_id}'}
@@ -0,0 +1,90 @@
+"""
+
+Defines the in-process caches shared by the application.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   -
+
+"""
+
+import threading
+from time import monotonic
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe mapping which evicts its least recently used entries
+    beyond 'maxsize' entries, or beyond 'maxbytes' as measured by 'sizeof',
+    and optionally expires entries older than 'ttl' seconds. It counts
+    its hits and misses.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None,
+                 maxbytes: Optional[int] = None, sizeof: Callable[[Any], int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and self.ttl is not None and monotonic() - entry[1] > self.ttl:
+                self._remove(key)
+                entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = self.sizeof(value)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, monotonic(), size)
+            self.bytes += size
+            while len(self._entries) > self.maxsize or (
+                    self.maxbytes is not None and self.bytes > self.maxbytes):
+                self._remove(next(iter(self._entries)))
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'bytes': self.bytes,
+            'maxbytes': self.maxbytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
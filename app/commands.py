@@ -4,16 +4,29 @@ Defines application CLI.
 
 Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
 Created:    June, 2020
-Modified:   -
+Modified:   October, 2026
 
 """
 
-from click import command
+import os
+import gzip
+import random
+from time import time
+
+from click import Choice, ClickException, argument, command, echo, get_binary_stream, open_file, option
 from flask import current_app
 from flask.cli import with_appcontext
+from sqlalchemy import and_, bindparam, true
 
 from .extensions import db
-from .models import User, Role
+from .models import User, Role, Post, recount_users
+from .search import search_index
+from .explain import EXPLAINABLE, audit
+from .hashing import hasher
+from .bulk import BulkLoader, read_ndjson, synthetic
+from .export import TYPES, gzipped, ndjson, records
+from .rendering import excerpt, highlight
+from . import timeline
 
 
 @command(name='create-db')
@@ -22,6 +35,7 @@ def create_tables():
     """Create tables described in models."""
 
     db.create_all()
+    search_index.create()
 
 
 @command(name='drop-db')
@@ -29,6 +43,7 @@ def create_tables():
 def drop_tables():
     """Delete tables described in models."""
 
+    search_index.drop()
     db.drop_all()
 
 
@@ -73,9 +88,233 @@ def create_admin():
     db.session.commit()
 
 
+@command(name='reindex')
+@with_appcontext
+def reindex():
+    """Rebuild the full-text search index of posts from scratch."""
+
+    search_index.create()
+    if not search_index.shared():
+        raise ClickException('Posts are searched in the memory of every process, '
+                             'which indexes them when it starts: restart the workers instead')
+    echo(f'Indexed {search_index.rebuild()} posts')
+
+
+@command(name='build-timelines')
+@with_appcontext
+def build_timelines():
+    """Build the materialized home timelines of all the existing users."""
+
+    echo(f'Built timelines of {_build_timelines()} users')
+
+
+def _build_timelines() -> int:
+    user_ids = [user_id for user_id, in db.session.query(User.id)]
+    for number, user_id in enumerate(user_ids, start=1):
+        timeline.rebuild(user_id)
+        if number % 100 == 0:
+            db.session.commit()
+    db.session.commit()
+    return len(user_ids)
+
+
+def _finish_loading(loader: BulkLoader) -> None:
+    counts = loader.finish()
+    echo(', '.join(f'{count} {kind}s' for kind, count in counts.items())
+         + f' loaded, {loader.skipped} records skipped')
+    echo(f'Built timelines of {_build_timelines()} users')
+    search_index.create()
+    if search_index.shared():
+        echo(f'Indexed {search_index.rebuild()} posts')
+    else:
+        echo('Restart the workers to search the new posts, they index them in memory when they start')
+
+
+@command(name='seed')
+@option('--users', default=1000, help='Number of users.')
+@option('--posts', default=10000, help='Number of posts.')
+@option('--tags', default=200, help='Number of tags.')
+@option('--following', default=20, help='Number of users each user follows.')
+@option('--tags-per-post', default=3, help='Number of tags of each post.')
+@option('--seed', 'rng_seed', default=0, help='Seed of the random generator.')
+@option('--password', default='password', help='Password of every user.')
+@option('--batch', default=10000, help='Rows per INSERT.')
+@with_appcontext
+def seed(users, posts, tags, following, tags_per_post, rng_seed, password, batch):
+    """Fill the database with a synthetic dataset of users named user<n>."""
+
+    loader = BulkLoader(hasher.hash(password), batch)
+    loader.load(synthetic(users, posts, tags, min(following, users - 1), tags_per_post,
+                          random.Random(rng_seed)))
+    _finish_loading(loader)
+
+
+@command(name='import')
+@argument('path')
+@option('--password', prompt='Password of the users without a hash', hide_input=True,
+        help='Password of the users without a password_hash.')
+@option('--batch', default=10000, help='Rows per INSERT.')
+@with_appcontext
+def import_records(path, password, batch):
+    """Load users, tags, posts and follows from an NDJSON file, '-' for stdin."""
+
+    loader = BulkLoader(hasher.hash(password), batch)
+    if path.endswith('.gz'):
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            loader.load(read_ndjson(file))
+    else:
+        with open_file(path, 'r', encoding='utf-8') as file:
+            loader.load(read_ndjson(file))
+    _finish_loading(loader)
+
+
+@command(name='export')
+@argument('path', default='-')
+@option('--type', 'types', type=Choice(TYPES), multiple=True,
+        help='Record type to export, repeat for several. Defaults to all.')
+@option('--hashes', is_flag=True, help='Export the password hashes of users.')
+@option('--gzip', 'compress', is_flag=True, help='Compress, implied by a .gz path.')
+@with_appcontext
+def export_records(path, types, hashes, compress):
+    """Write users, posts and follows as NDJSON to a file, '-' for stdout."""
+
+    lines = ndjson(records(types or TYPES, hashes))
+    if compress or path.endswith('.gz'):
+        file = get_binary_stream('stdout') if path == '-' else open(path, 'wb')
+        try:
+            for chunk in gzipped(lines):
+                file.write(chunk)
+        finally:
+            if path != '-':
+                file.close()
+    else:
+        with open_file(path, 'w', encoding='utf-8') as file:
+            file.writelines(lines)
+
+
+def _derive(column, func, posts, batch: int) -> int:
+    """
+    Sets 'column' of every post matched by the 'posts' filter to 'func'
+    of its content, a batch per statement, and returns how many posts
+    were updated. The posts are not edited, so 'updated_at' is kept; the
+    fragments and the ETags of pages follow the markup itself instead,
+    see 'fragments.markup_version'.
+    """
+
+    table = Post.__table__
+    statement = table.update().where(table.c.id == bindparam('post_id')).values({
+        column.key: bindparam('value'),
+        table.c.updated_at.key: table.c.updated_at
+    })
+    last, count = 0, 0
+    while True:
+        rows = db.session.query(Post.id, Post.content).filter(posts, Post.id > last) \
+            .order_by(Post.id).limit(batch).all()
+        if not rows:
+            return count
+        db.session.execute(statement, [{'post_id': post_id, 'value': func(content)}
+                                       for post_id, content in rows])
+        db.session.commit()
+        last, count = rows[-1].id, count + len(rows)
+
+
+@command(name='build-excerpts')
+@option('--all', 'everything', is_flag=True, help='Rebuild every excerpt, not only the missing ones.')
+@option('--batch', default=1000, help='Posts per UPDATE.')
+@with_appcontext
+def build_excerpts(everything, batch):
+    """Compute the excerpts listings show, e.g. after upgrading."""
+
+    posts = true() if everything else Post.excerpt.is_(None)
+    echo(f'Built the excerpts of {_derive(Post.excerpt, excerpt, posts, batch)} posts')
+
+
+@command(name='render-posts')
+@option('--all', 'everything', is_flag=True, help='Render every post, not only the unrendered ones.')
+@option('--batch', default=1000, help='Posts per UPDATE.')
+@with_appcontext
+def render_posts(everything, batch):
+    """Highlight the code blocks of posts, e.g. after upgrading Pygments."""
+
+    if everything:
+        posts = true()
+    else:
+        posts = and_(Post.content_html.is_(None), Post.content.like('%<pre%'))
+    echo(f'Rendered {_derive(Post.content_html, highlight, posts, batch)} posts')
+
+
+@command(name='repair-counters')
+@with_appcontext
+def repair_counters():
+    """Recompute the follower, following and post counters of all users."""
+
+    result = db.session.execute(recount_users())
+    db.session.commit()
+    echo(f'Recounted {result.rowcount} users')
+
+
+@command(name='prune-pictures')
+@option('--min-age', default=3600, help='Keep files younger than this many seconds.')
+@with_appcontext
+def prune_pictures(min_age):
+    """Delete the profile pictures no user refers to anymore."""
+
+    directory = os.path.join(current_app.root_path, 'static', 'images', 'profile_pics')
+    in_use = {os.path.splitext(image_file)[0] for image_file, in db.session.query(User.image_file)}
+    removed = 0
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        stem = os.path.splitext(name)[0].split('-', 1)[0]
+        if name == 'default.jpg' or stem in in_use or time() - os.path.getmtime(path) < min_age:
+            continue
+        os.remove(path)
+        removed += 1
+    echo(f'Removed {removed} files')
+
+
+@command(name='explain-hotpaths')
+@option('--user', 'user_id', default=1, help='Id of the user viewing the pages.')
+@option('--other', 'other_id', default=2, help='Id of another user.')
+@option('--tag', 'tag_id', default=1, help='Id of a tag.')
+@option('--verbose', is_flag=True, help='Print every statement with its plan.')
+@with_appcontext
+def explain_hotpaths(user_id, other_id, tag_id, verbose):
+    """Explain the queries of the hot paths, failing on full table scans."""
+
+    dialect = db.engine.dialect.name
+    if dialect not in EXPLAINABLE:
+        echo(f'Query plans cannot be read on {dialect}, skipped the audit '
+             f'(supported: {", ".join(EXPLAINABLE)})')
+        return
+
+    failures = 0
+    for name, statements in audit(user_id, other_id, tag_id).items():
+        scans = sorted({table for statement in statements for table in statement['scans']})
+        failures += len(scans)
+        status = f'FULL SCAN of {", ".join(scans)}' if scans else 'ok'
+        echo(f'{name}: {len(statements)} statements, {status}')
+        for statement in statements:
+            if verbose or statement['scans']:
+                echo('    ' + ' '.join(statement['sql'].split()))
+                for line in statement['plan']:
+                    echo('        ' + line)
+    if failures:
+        raise ClickException(f'{failures} full table scans on hot paths')
+
+
 commands = [
     create_tables,
     drop_tables,
     create_roles,
-    create_admin
+    create_admin,
+    reindex,
+    build_timelines,
+    repair_counters,
+    prune_pictures,
+    explain_hotpaths,
+    seed,
+    import_records,
+    export_records,
+    build_excerpts,
+    render_posts
 ]
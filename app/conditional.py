@@ -0,0 +1,99 @@
+"""
+
+Answers conditional GETs before any template work.
+
+Views compute cheap validators (ids, versions and pagination state of
+what they are about to render) and call 'conditional', which returns a
+304 response if the client already has that version, or arranges for
+the rendered response to carry its ETag. No page sends Last-Modified:
+each depends on more than the dates of its posts (authors, tags, the
+viewer), so If-Modified-Since alone cannot tell whether a copy is
+current.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import os
+import hashlib
+from typing import Optional
+
+from flask import current_app, request, session, after_this_request
+from flask_login import current_user
+from werkzeug.wrappers import Response
+
+from .fragments import markup_version
+
+
+def templates_version(app) -> str:
+    """
+    Fingerprints the templates, so a deployment changes every ETag. The
+    modification times are the same in every worker process.
+    """
+
+    mtimes = []
+    for root, _, files in os.walk(os.path.join(app.root_path, app.template_folder)):
+        mtimes.extend(os.path.getmtime(os.path.join(root, name)) for name in files)
+    return str(max(mtimes, default=0))
+
+
+def listing_validators(posts) -> tuple:
+    """
+    Validators of a page of posts, whether an offset or a keyset one.
+    Listings only get an ETag: the newest date of a page does not change
+    when a post leaves it or a follow changes /home, so it cannot tell
+    whether a copy is current.
+    """
+
+    items = tuple(
+        (post.id, post.updated_at, markup_version(post),
+         post.author.username, post.author.image_file)
+        for post in posts.items
+    )
+    state = (getattr(posts, 'page', None), posts.total, posts.has_prev, posts.has_next)
+    return items, state
+
+
+def _etag(parts) -> str:
+    # pages show who is signed in, so the version varies per user
+    viewer = (current_user.get_id(), current_user.username) if current_user.is_authenticated else None
+    data = repr((current_app.config['TEMPLATES_VERSION'], request.full_path, viewer, parts))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def is_fresh(etag: str) -> bool:
+    """Whether the client's copy, per the request's If-None-Match, is current."""
+
+    return bool(request.if_none_match) and request.if_none_match.contains(etag)
+
+
+def conditional(parts) -> Optional[Response]:
+    """
+    :param parts:  Anything the page depends on, besides the viewer and
+                   the URL, with a stable 'repr'
+    :return:       A 304 response if the client's copy is current,
+                   otherwise None and the view should render
+    """
+
+    # a pending flash message makes the page differ from the cached one
+    if request.method != 'GET' or session.get('_flashes'):
+        return None
+
+    etag = _etag(parts)
+
+    def validators(response):
+        if response.status_code not in (200, 304):
+            return response
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.vary.add('Cookie')
+        return response
+
+    if is_fresh(etag):
+        return validators(Response(status=304))
+
+    after_this_request(validators)
+    return None
@@ -4,7 +4,7 @@ Creates error handlers with their own templates for each of the status codes.
 
 Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
 Created:    June, 2020
-Modified:   -
+Modified:   October, 2026
 
 """
 
@@ -30,5 +30,5 @@ def error_templates(app):
         code = getattr(status, 'code', 500)
         return render_template(f'errors/{code}.html'), code
 
-    for error in [403, 404, 500]:
+    for error in [403, 404, 500, 503]:
         app.errorhandler(error)(render_status)
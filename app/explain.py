@@ -0,0 +1,165 @@
+"""
+
+Audits the query plans behind the hot paths of the application.
+
+Every hot path is run for real against the current database while its
+SQL statements are recorded, then each statement is explained: EXPLAIN
+QUERY PLAN on SQLite, EXPLAIN with sequential scans disabled on
+PostgreSQL, so that a scan is only planned when no index can serve it,
+and EXPLAIN on MySQL. Other databases cannot be audited.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import re
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+
+from .extensions import db
+from .models import User, Post, Tag, role_registry
+from .search import search_index
+from . import timeline
+
+EXPLAINABLE = ('sqlite', 'postgresql', 'mysql')
+# MySQL access types reading a whole table, or walking a whole index
+MYSQL_SCANS = {'ALL': False, 'index': True}
+SQLITE_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+POSTGRES_SCAN_RE = re.compile(r'Seq Scan on (\w+)')
+ALIAS_RE = re.compile(r'_\d+$')
+
+
+class HotPath:
+    """
+    A function running the queries of a hot path. Full table scans always
+    fail the audit, full index walks only on tables not in 'walks', such
+    as the ordered index of a listing cut short by its LIMIT.
+    """
+
+    def __init__(self, name: str, func: Callable, walks: Tuple[str, ...] = ()):
+        self.name = name
+        self.func = func
+        self.walks = walks
+
+
+def _stub(model, ident: int):
+    # a row that may not exist, queries are explained all the same
+    instance = model(id=ident)
+    make_transient_to_detached(instance)
+    return db.session.merge(instance, load=False)
+
+
+def hot_paths(user_id: int, other_id: int, tag_id: int) -> List[HotPath]:
+    from .blueprints.main.navigation_tools import paginate, seek, search
+
+    user, other, tag = _stub(User, user_id), _stub(User, other_id), _stub(Tag, tag_id)
+
+    def home():
+        posts, key = timeline.home(user)
+        paginate(2, posts, key=key, error_out=False)
+
+    def has_role():
+        role_registry.invalidate()
+        db.session.expire(user, ['roles'])
+        user.has_role('Admin')
+
+    return [
+        HotPath('paginate', lambda: paginate(2, Post.query, error_out=False), walks=('post',)),
+        HotPath('seek', lambda: seek(Post.query), walks=('post',)),
+        HotPath('paginate tag', lambda: paginate(2, tag.posts, error_out=False)),
+        HotPath('paginate author', lambda: paginate(2, Post.query.filter_by(author=user), error_out=False)),
+        HotPath('home', home),
+        HotPath('followed_posts', lambda: paginate(2, user.followed_posts(), error_out=False)),
+        HotPath('search', lambda: paginate(1, search(Post.query, 'lorem ipsum', scoped=False), error_out=False)),
+        HotPath('is_following', lambda: user.is_following(other)),
+        HotPath('following_ids', lambda: user.following_ids([user, other])),
+        HotPath('has_role', has_role, walks=('role',)),
+    ]
+
+
+@contextmanager
+def record_statements() -> Iterator[List[Tuple[str, object]]]:
+    """Records the statements and DB-API parameters the block executes."""
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def explain(statement: str, parameters) -> Tuple[List[str], List[Tuple[str, bool]]]:
+    """
+    Explains a recorded statement.
+
+    :return: The lines of the plan and the tables it reads in full, each
+             with whether it is walked through an index
+    :raise ValueError: On a database not in 'EXPLAINABLE'
+    """
+
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        rows = connection.execute('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+        plan = [row[-1] for row in rows]
+        scans = [(match.group(1), 'INDEX' in line) for line in plan
+                 if (match := SQLITE_SCAN_RE.match(line))]
+    elif dialect == 'postgresql':
+        connection.execute('SET LOCAL enable_seqscan = off')
+        rows = connection.execute('EXPLAIN ' + statement, parameters).fetchall()
+        plan = [row[0] for row in rows]
+        scans = [(match.group(1), False) for line in plan
+                 if (match := POSTGRES_SCAN_RE.search(line))]
+    elif dialect == 'mysql':
+        rows = connection.execute('EXPLAIN ' + statement, parameters).fetchall()
+        plan = [' '.join(f'{key}={value}' for key, value in row.items() if value is not None) for row in rows]
+        scans = [(row['table'], MYSQL_SCANS[row['type']]) for row in rows
+                 if row['type'] in MYSQL_SCANS and row['table']]
+    else:
+        raise ValueError(f'Cannot explain queries on {dialect}, only on {", ".join(EXPLAINABLE)}')
+
+    # subqueries and constant rows are scanned too, only tables matter (e.g. 'user_1')
+    tables = db.metadata.tables
+    scans = [(table, indexed) for name, indexed in scans
+             if (table := ALIAS_RE.sub('', name)) in tables]
+    return plan, scans
+
+
+def audit(user_id: int = 1, other_id: int = 2, tag_id: int = 1) -> Dict[str, List[dict]]:
+    """
+    Runs and explains every hot path.
+
+    :return: Hot path name -> its statements, each with its 'sql', 'plan'
+             and the tables it unexpectedly reads in full as 'scans'
+    """
+
+    search_index.backend  # built beforehand, filling it is not a hot path
+    report = {}
+    try:
+        for path in hot_paths(user_id, other_id, tag_id):
+            with record_statements() as statements:
+                path.func()
+            report[path.name] = []
+            for statement, parameters in statements:
+                plan, scans = explain(statement, parameters)
+                report[path.name].append({
+                    'sql': statement,
+                    'plan': plan,
+                    'scans': [table for table, indexed in scans
+                              if not indexed or table not in path.walks]
+                })
+    finally:
+        db.session.rollback()
+    return report
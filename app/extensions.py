@@ -4,10 +4,14 @@ Defines application extensions to protect against recursive imports.
 
 Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
 Created:    June, 2020
-Modified:   -
+Modified:   October, 2026
 
 """
 
+import os
+import threading
+from typing import Any, Callable
+
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
@@ -18,6 +22,36 @@ from flask_ckeditor import CKEditor
 
 from .admin import HomeAdminView
 
+
+class PerProcess:
+    """
+    Calls 'start' the first time 'ensure' is called in a process, and
+    again in every process forked from it, since the threads 'start'
+    runs do not survive a fork. Background workers are started this way,
+    lazily, so that forking servers start them in every worker.
+    """
+
+    def __init__(self, start: Callable[[], Any]):
+        self.start = start
+        self.lock = threading.Lock()
+        self.pid = None
+        self.value = None
+
+    @property
+    def started(self) -> bool:
+        return self.pid == os.getpid()
+
+    def ensure(self) -> Any:
+        """Starts the workers of this process if needed, returns what 'start' did."""
+
+        if not self.started:
+            with self.lock:
+                if not self.started:
+                    self.value = self.start()
+                    self.pid = os.getpid()
+        return self.value
+
+
 db = SQLAlchemy()
 migrate = Migrate()
 bcrypt = Bcrypt()
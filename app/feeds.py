@@ -0,0 +1,144 @@
+"""
+
+Serves Atom feeds of the newest posts: of everyone, of a tag and of a
+user.
+
+A feed is versioned by the ids, update dates and author names of its
+'FEED_SIZE' newest posts, read without their content. The version gives
+the ETag, so aggregators polling an unchanged feed get a 304 after that
+single query. If-Modified-Since is not honoured: a deleted post lets an
+older one into the feed without changing its newest date.
+
+Otherwise the feed is served from an in-process cache, or streamed from
+its template while being cached. Views writing posts invalidate the
+feeds they appear in, to free the memory right away; a stale feed is
+never served since its version would differ.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from typing import Hashable, Iterable, Iterator
+
+from flask import Response, current_app, request, stream_with_context
+from sqlalchemy.orm import undefer
+
+from .cache import LRUCache
+from .models import User, Post
+from .conditional import is_fresh
+
+TEMPLATE = 'feeds/atom.xml'
+EVERYONE = ('everyone',)
+
+
+def tag_key(tag_id: int) -> tuple:
+    return 'tag', tag_id
+
+
+def user_key(user_id: int) -> tuple:
+    return 'user', user_id
+
+
+def rfc3339(moment) -> str:
+    # dates are stored in local time
+    return moment.astimezone(timezone.utc).isoformat(timespec='seconds')
+
+
+class FeedCache:
+    """Flask extension caching the rendered Atom feeds of an application."""
+
+    def init_app(self, app):
+        app.config.setdefault('FEED_SIZE', 20)
+        app.config.setdefault('FEED_MAX_AGE', 60)
+        app.config.setdefault('FEED_CACHE_SIZE', 1024)
+        app.config.setdefault('FEED_CACHE_MAX_BYTES', 16 * 1024 * 1024)
+        app.extensions['feeds'] = LRUCache(
+            maxsize=app.config['FEED_CACHE_SIZE'],
+            maxbytes=app.config['FEED_CACHE_MAX_BYTES'],
+            sizeof=lambda entry: len(entry[1])
+        )
+        app.add_template_filter(rfc3339)
+
+    @property
+    def cache(self) -> LRUCache:
+        return current_app.extensions['feeds']
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        for key in keys:
+            self.cache.pop(key)
+
+    def invalidate_post(self, user_id: int, tag_ids: Iterable[int]) -> None:
+        """Drops the feeds a post of 'user_id' tagged with 'tag_ids' appears in."""
+
+        self.invalidate([EVERYONE, user_key(user_id), *map(tag_key, tag_ids)])
+
+    def response(self, key: Hashable, posts, title: str, page: str) -> Response:
+        """
+        Answers a request for a feed, with a 304 if the client has the
+        current version.
+
+        :param key:   Identifies the feed in the cache
+        :param posts: The query of the posts in the feed
+        :param title: The title of the feed
+        :param page:  The URL of the HTML page showing the same posts
+        """
+
+        config = current_app.config
+
+        def newest(query):
+            return query.order_by(Post.date.desc(), Post.id.desc()).limit(config['FEED_SIZE'])
+
+        version = newest(posts.join(User, Post.user_id == User.id).with_entities(
+            Post.id, Post.updated_at, User.username)).all()
+        # the URLs in the feed are absolute, so they depend on the host,
+        # and its id is the URL without the query string
+        data = repr((config['TEMPLATES_VERSION'], request.base_url, title, version))
+        etag = hashlib.sha1(data.encode('utf-8')).hexdigest()
+        updated = max((row.updated_at for row in version), default=None)
+
+        if is_fresh(etag):
+            response = Response(status=304)
+        else:
+            entry = self.cache.get(key)
+            if entry is not None and entry[0] == etag:
+                body = entry[1]
+            else:
+                from .blueprints.main.navigation_tools import eager
+
+                template = current_app.jinja_env.get_template(TEMPLATE)
+                entries = newest(eager(posts).options(undefer(Post.content)))
+                chunks = template.generate(title=title, page=page, posts=entries,
+                                           updated=updated or datetime.now())
+                body = stream_with_context(self._fill(key, etag, chunks))
+            response = Response(body, mimetype='application/atom+xml')
+
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = config['FEED_MAX_AGE']
+        return response
+
+    def _fill(self, key: Hashable, etag: str, chunks: Iterator[str],
+              buffer: int = 8 * 1024) -> Iterator[bytes]:
+        """Streams the rendered chunks in blocks of about 'buffer' bytes, then caches the feed."""
+
+        parts, pending, size = [], [], 0
+        for chunk in chunks:
+            pending.append(chunk)
+            size += len(chunk)
+            if size >= buffer:
+                block = ''.join(pending).encode('utf-8')
+                parts.append(block)
+                pending, size = [], 0
+                yield block
+        block = ''.join(pending).encode('utf-8')
+        parts.append(block)
+        yield block
+        # only a feed streamed to the end is cached
+        self.cache.set(key, (etag, b''.join(parts)))
+
+
+feeds = FeedCache()
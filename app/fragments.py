@@ -0,0 +1,90 @@
+"""
+
+Caches the rendered HTML of post blocks across requests.
+
+A fragment is versioned by 'Post.updated_at', by the author fields it
+shows and by the derived markup it shows ('markup_version'), so a stale
+one is never served; views still invalidate fragments when they change a
+post or its author, to free the memory right away.
+Fragments are shared by every visitor and therefore rendered without the
+request's template context (no 'current_user').
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import zlib
+from typing import Any, Dict, Iterable
+
+from flask import current_app
+from markupsafe import Markup
+
+from .cache import LRUCache
+from .extensions import db
+from .models import Post
+
+LISTING = 'posts/article.html'
+PAGE = 'posts/article_page.html'
+TEMPLATES = (LISTING, PAGE)
+
+
+def markup_version(post: Post, template: str = LISTING) -> int:
+    """
+    Fingerprints the markup derived from the content that 'template'
+    shows: the excerpt in listings, the highlighted content on the page.
+    'flask build-excerpts' and 'flask render-posts' rewrite it without
+    changing 'Post.updated_at'.
+    """
+
+    markup = post.excerpt if template == LISTING else post.content_html
+    return zlib.crc32((markup or '').encode('utf-8'))
+
+
+class FragmentCache:
+    """Flask extension holding the rendered post fragments of an application."""
+
+    def init_app(self, app):
+        app.config.setdefault('FRAGMENT_CACHE_SIZE', 10000)
+        app.config.setdefault('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+        app.extensions['fragments'] = LRUCache(
+            maxsize=app.config['FRAGMENT_CACHE_SIZE'],
+            maxbytes=app.config['FRAGMENT_CACHE_MAX_BYTES'],
+            sizeof=lambda entry: len(entry[1])
+        )
+        app.add_template_global(self.post, 'post_fragment')
+
+    @property
+    def cache(self) -> LRUCache:
+        return current_app.extensions['fragments']
+
+    def post(self, post: Post, template: str = LISTING) -> Markup:
+        """Renders the block of a post with 'template', or takes it from the cache."""
+
+        version = (post.updated_at, markup_version(post, template),
+                   post.author.username, post.author.image_file)
+        entry = self.cache.get((template, post.id))
+        if entry is not None and entry[0] == version:
+            return Markup(entry[1])
+
+        html = current_app.jinja_env.get_template(template).render(post=post)
+        self.cache.set((template, post.id), (version, html))
+        return Markup(html)
+
+    def invalidate(self, post_ids: Iterable[int]) -> None:
+        for post_id in post_ids:
+            for template in TEMPLATES:
+                self.cache.pop((template, post_id))
+
+    def invalidate_author(self, user_id: int) -> None:
+        """Drops the fragments of every post of a user, e.g. on a profile change."""
+
+        self.invalidate(post_id for post_id, in db.session.query(Post.id).filter_by(user_id=user_id))
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats
+
+
+fragments = FragmentCache()
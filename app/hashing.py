@@ -0,0 +1,117 @@
+"""
+
+Hashes passwords with bcrypt off the request threads.
+
+Hashes run in a pool of 'HASHING_WORKERS' threads (bcrypt releases the
+GIL), and at most 'HASHING_QUEUE_SIZE' more may wait for one of them for
+'HASHING_QUEUE_TIMEOUT' seconds: beyond that the request fails fast with
+a 503 rather than piling up behind a login storm. Unless
+'HASHING_ROUNDS' is set, the work factor is calibrated at startup so a
+hash takes about 'BCRYPT_TARGET_MS' milliseconds on this machine. Every
+process calibrates on its own and may land on another work factor, so
+hashes are only ever upgraded to a higher one.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import threading
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from flask import current_app
+from werkzeug.exceptions import ServiceUnavailable
+
+from .extensions import bcrypt
+
+
+class HasherBusy(ServiceUnavailable):
+    description = 'Too many sign ins at once, please try again in a moment'
+
+
+def calibrate(target_ms: float, min_rounds: int = 10, max_rounds: int = 15) -> int:
+    """
+    Finds the highest work factor whose hash takes at most 'target_ms',
+    knowing that every extra round doubles the cost.
+    """
+
+    def duration(rounds):
+        start = perf_counter()
+        bcrypt.generate_password_hash('calibration', rounds)
+        return (perf_counter() - start) * 1000
+
+    base = min(duration(4) for _ in range(3))
+    rounds = 4
+    while rounds < max_rounds and base * 2 ** (rounds + 1 - 4) <= target_ms:
+        rounds += 1
+    rounds = max(rounds, min_rounds)
+    # the extrapolation ignores the fixed costs, measure the real thing
+    while rounds > min_rounds and duration(rounds) > target_ms * 1.5:
+        rounds -= 1
+    return rounds
+
+
+class _Pool:
+    def __init__(self, app):
+        self.rounds = app.config['HASHING_ROUNDS'] or calibrate(app.config['BCRYPT_TARGET_MS'])
+        self.timeout = app.config['HASHING_QUEUE_TIMEOUT']
+        workers = app.config['HASHING_WORKERS']
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self.slots = threading.BoundedSemaphore(workers + app.config['HASHING_QUEUE_SIZE'])
+
+    def run(self, func, *args):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise HasherBusy()
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise HasherBusy()
+
+
+class PasswordHasher:
+    """Flask extension running the bcrypt work of an application."""
+
+    def init_app(self, app):
+        app.config.setdefault('HASHING_ROUNDS', None)
+        app.config.setdefault('BCRYPT_TARGET_MS', 250)
+        app.config.setdefault('HASHING_WORKERS', 4)
+        app.config.setdefault('HASHING_QUEUE_SIZE', 16)
+        app.config.setdefault('HASHING_QUEUE_TIMEOUT', 5.0)
+        pool = _Pool(app)
+        app.extensions['hasher'] = pool
+        app.logger.info('Hashing passwords with %d bcrypt rounds', pool.rounds)
+
+    @property
+    def _pool(self) -> _Pool:
+        return current_app.extensions['hasher']
+
+    @property
+    def rounds(self) -> int:
+        return self._pool.rounds
+
+    def hash(self, password: str) -> str:
+        pool = self._pool
+        return pool.run(bcrypt.generate_password_hash, password, pool.rounds).decode('utf-8')
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._pool.run(bcrypt.check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Tells whether a hash was made with a lower work factor ('$2b$12$...')."""
+
+        try:
+            return int(password_hash.split('$')[2]) < self.rounds
+        except (IndexError, ValueError):
+            return True
+
+
+hasher = PasswordHasher()
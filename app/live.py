@@ -0,0 +1,169 @@
+"""
+
+Tells the pages listing posts about the posts written after they were
+rendered, so readers need not reload them.
+
+Clients send the highest post id they know of, their high-water mark,
+along with the '(date, id)' cursor of the post on top of their listing,
+and get the posts written since then that sort above it as rendered
+fragments, either pushed through
+Server-Sent Events or by polling. Both wait on an in-process hub holding
+the newest post id: 'posts.create_post' publishes to it, and it reads
+the newest id from the database at most every 'LIVE_REFRESH_INTERVAL'
+seconds to learn about posts written by other processes. A client with
+nothing new therefore costs no query of its own. Posts imported with an
+older date sort below the top of the listing, they are not pushed. When
+more than 'LIVE_MAX_POSTS' posts are new, clients are told to reload.
+
+An open stream keeps a worker thread busy, set 'LIVE_SSE_ENABLED' to
+False when serving with a few synchronous workers, pages then poll.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import json
+import threading
+from time import monotonic
+from typing import Dict, Iterator, List, Optional
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from .extensions import db
+from .models import Post
+from .fragments import fragments
+
+
+class _Hub:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.refreshing = threading.Lock()
+        self.latest = 0
+        self.checked = None
+
+    def publish(self, post_id: int) -> None:
+        with self.condition:
+            if post_id > self.latest:
+                self.latest = post_id
+                self.condition.notify_all()
+
+    def newest(self, interval: float) -> int:
+        """The newest post id, read from the database if it was not for 'interval' seconds."""
+
+        stale = self.checked is None or monotonic() - self.checked >= interval
+        # a single thread reads it, the others go on with the value they have
+        if stale and self.refreshing.acquire(blocking=False):
+            try:
+                self.checked = monotonic()
+                # not through the session: the connection must not stay
+                # checked out by an idle stream
+                with db.engine.connect() as connection:
+                    newest = connection.scalar(db.select([db.func.max(Post.id)])) or 0
+                self.publish(newest)
+            finally:
+                self.refreshing.release()
+        return self.latest
+
+    def wait(self, since: int, timeout: float, interval: float) -> int:
+        """Waits up to 'timeout' seconds for a post newer than 'since', returns the newest id."""
+
+        deadline = monotonic() + timeout
+        while True:
+            latest = self.newest(interval)
+            remaining = deadline - monotonic()
+            if latest > since or remaining <= 0:
+                return latest
+            with self.condition:
+                if self.latest <= since:
+                    self.condition.wait(min(remaining, interval))
+
+
+class PostHub:
+    """Flask extension publishing the ids of new posts to the clients waiting for them."""
+
+    def init_app(self, app):
+        app.config.setdefault('LIVE_SSE_ENABLED', True)
+        app.config.setdefault('LIVE_REFRESH_INTERVAL', 5)
+        app.config.setdefault('LIVE_HEARTBEAT', 15)
+        app.config.setdefault('LIVE_STREAM_TIMEOUT', 300)
+        app.config.setdefault('LIVE_POLL_INTERVAL', 20)
+        app.config.setdefault('LIVE_MAX_POSTS', 20)
+        app.extensions['live'] = _Hub()
+
+    @property
+    def hub(self) -> _Hub:
+        return current_app.extensions['live']
+
+    def publish(self, post_id: int) -> None:
+        """Wakes the clients up, call it once the post is committed."""
+
+        self.hub.publish(post_id)
+
+    def updates(self, posts, key, since: Optional[int], top: Optional[str] = None) -> Dict:
+        """
+        Renders the 'posts' newer than 'since' sorting above the 'top'
+        cursor, newest first.
+
+        :param posts: The query of the listing
+        :param key:   The columns the listing is ordered by
+        :param top:   The cursor of the post on top of the client's listing
+        :return:      The new high-water mark, the new top and the posts, as
+                      {'last': id, 'top': cursor, 'posts': [{'id': id, 'html': html}]},
+                      or 'reload': True instead of the posts when there are
+                      too many of them
+        """
+
+        config = current_app.config
+        latest = self.hub.newest(config['LIVE_REFRESH_INTERVAL'])
+        if since is None or latest <= since:
+            return {'last': max(latest, since or 0), 'top': top, 'posts': []}
+
+        from .blueprints.main.navigation_tools import eager, encode_cursor, decode_cursor
+
+        date, ident = key
+        posts = posts.filter(Post.id > since)
+        if cursor := decode_cursor(top):
+            posts = posts.filter(or_(date > cursor[0], and_(date == cursor[0], ident > cursor[1])))
+        limit = config['LIVE_MAX_POSTS']
+        items = eager(posts).order_by(date.desc(), ident.desc()).limit(limit + 1).all()
+        if len(items) > limit:
+            # the ones left out would never be sent
+            return {'last': latest, 'top': top, 'posts': [], 'reload': True}
+        if items:
+            top = encode_cursor(items[0].date, items[0].id)
+        rendered = [{'id': post.id, 'html': str(fragments.post(post))} for post in items]
+        return {'last': latest, 'top': top, 'posts': rendered}
+
+    def stream(self, posts, key, since: int, top: Optional[str] = None) -> Iterator[str]:
+        """Yields the Server-Sent Events of the 'posts' newer than 'since' until the stream times out."""
+
+        config = current_app.config
+        deadline = monotonic() + config['LIVE_STREAM_TIMEOUT']
+        # the connection must not stay checked out while waiting
+        db.session.close()
+        # the browser reconnects after the stream ends, resuming from the last event id
+        yield f'retry: {config["LIVE_REFRESH_INTERVAL"] * 1000}\n\n'
+        while monotonic() < deadline:
+            timeout = min(config['LIVE_HEARTBEAT'], deadline - monotonic())
+            if self.hub.wait(since, timeout, config['LIVE_REFRESH_INTERVAL']) <= since:
+                yield ': keepalive\n\n'
+                continue
+            update = self.updates(posts, key, since, top)
+            db.session.close()
+            since, top = update['last'], update['top']
+            if update['posts'] or update.get('reload'):
+                yield f'id: {since}:{top or ""}\nevent: posts\ndata: {json.dumps(update)}\n\n'
+            else:
+                yield f'id: {since}:{top or ""}\n\n'
+            if update.get('reload'):
+                return
+
+
+def high_water_mark(items: List[Post]) -> int:
+    return max((post.id for post in items), default=0)
+
+
+live = PostHub()
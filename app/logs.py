@@ -0,0 +1,203 @@
+"""
+
+Takes logging off the request threads.
+
+Records are put on a bounded queue and written by a background listener
+thread, so a slow disk or SMTP server never delays a response; records
+arriving while the queue is full are dropped and counted. The file gets
+one JSON object per line, stamped with the request. Errors are mailed at most once per
+'LOGGING_MAIL_INTERVAL' seconds for the same failure, and at most
+'LOGGING_MAIL_PER_HOUR' times an hour overall, every email telling how
+many were held back. DEBUG records of a given line are sampled, one in
+'LOGGING_DEBUG_SAMPLE' is kept.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import copy
+import json
+import queue
+import atexit
+import logging
+import threading
+from time import monotonic
+from collections import Counter, deque
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, SMTPHandler
+from typing import List
+
+from flask import has_request_context, request
+
+from .extensions import PerProcess
+
+EXTRA_FIELDS = ('request', 'sampled', 'dropped')
+
+_plain = logging.Formatter()
+
+
+def _signature(record: logging.LogRecord) -> str:
+    """Identifies a failure: the innermost frame of its exception, or else the logging line."""
+
+    if record.exc_info and record.exc_info[2] is not None:
+        traceback = record.exc_info[2]
+        while traceback.tb_next is not None:
+            traceback = traceback.tb_next
+        frame = traceback.tb_frame
+        return f'{record.exc_info[0].__name__} at {frame.f_code.co_filename}:{traceback.tb_lineno}'
+    return f'{record.pathname}:{record.lineno}:{record.msg}'
+
+
+class RequestFilter(logging.Filter):
+    """Stamps records with the request being served, read before it leaves the thread."""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request = {
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'remote_addr': request.remote_addr
+            }
+        return True
+
+
+class Sampler(logging.Filter):
+    """Keeps the first DEBUG record of every line, then one in 'every'."""
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = every
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every <= 1:
+            return True
+        with self.lock:
+            self.counts[record.pathname, record.lineno] += 1
+            seen = self.counts[record.pathname, record.lineno]
+        if (seen - 1) % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'location': f'{record.pathname}:{record.lineno}',
+            'process': record.process,
+            'thread': record.threadName
+        }
+        for field in EXTRA_FIELDS:
+            if hasattr(record, field):
+                data[field] = getattr(record, field)
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class ThrottledSMTPHandler(SMTPHandler):
+    """
+    Mails a failure once per 'interval' seconds and at most 'per_hour'
+    emails an hour, counting the records held back. The limits hold for
+    the handler's own process, every worker mails on its own.
+    """
+
+    def __init__(self, *args, interval: float, per_hour: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.interval = interval
+        self.per_hour = per_hour
+        self.recent = {}
+        self.sent = deque()
+        self.held_back = 0
+
+    def emit(self, record):
+        now = monotonic()
+        signature = getattr(record, 'signature', None) or _signature(record)
+        last = self.recent.get(signature)
+        while self.sent and now - self.sent[0] > 3600:
+            self.sent.popleft()
+        if last is not None and now - last[0] < self.interval or len(self.sent) >= self.per_hour:
+            if last is not None:
+                last[1] += 1
+            self.held_back += 1
+            return
+
+        notes = []
+        if last is not None and last[1]:
+            notes.append(f'{last[1]} more of this failure since the last email.')
+        if self.held_back:
+            notes.append(f'{self.held_back} errors in all were not mailed since the last email.')
+        for stale in [key for key, (when, _) in self.recent.items() if now - when >= self.interval]:
+            # the failures held back since its last email are reported before forgetting it
+            count = self.recent.pop(stale)[1]
+            if count and stale != signature:
+                notes.append(f'{count} more of {stale} since its last email.')
+        self.recent[signature] = [now, 0]
+        self.sent.append(now)
+        self.held_back = 0
+
+        if notes:
+            record = copy.copy(record)
+            record.msg = f'{record.msg}\n\n' + '\n'.join(notes)
+        super().emit(record)
+
+
+class AsyncHandler(QueueHandler):
+    """Hands records to a listener thread writing them to 'handlers'."""
+
+    def __init__(self, handlers: List[logging.Handler], size: int):
+        super().__init__(queue.Queue(size))
+        self.targets = handlers
+        self.size = size
+        self.listener = PerProcess(self._start)
+        self.dropped = 0
+
+    def _start(self) -> QueueListener:
+        # the queue of the parent process may hold records it never wrote
+        self.queue = queue.Queue(self.size)
+        listener = QueueListener(self.queue, *self.targets, respect_handler_level=True)
+        listener.start()
+        atexit.register(self._stop, listener)
+        return listener
+
+    @staticmethod
+    def _stop(listener: QueueListener) -> None:
+        # writes out the records still queued, unless already stopped
+        if listener._thread is not None:
+            listener.stop()
+
+    def prepare(self, record):
+        # what the handlers need of the record, without what cannot cross threads
+        record = copy.copy(record)
+        record.signature = _signature(record)
+        if record.exc_info:
+            record.exc_text = _plain.formatException(record.exc_info)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def emit(self, record):
+        self.listener.ensure()
+        super().emit(record)
+
+    def enqueue(self, record):
+        if self.dropped:
+            record.dropped = self.dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self.dropped = 0
@@ -1,22 +1,31 @@
+from time import monotonic
 from datetime import datetime
-from typing import Optional
+from itertools import chain
+from typing import Optional, FrozenSet, Iterable, Set
 
-from flask import current_app
+from flask import current_app, has_app_context
 from flask_login import UserMixin
 from itsdangerous import TimedJSONWebSignatureSerializer as Serializer
+from sqlalchemy import event, exists, inspect
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached, query_expression
 
-from .extensions import db, bcrypt, login_manager
+from .cache import LRUCache
+from .extensions import db, login_manager
+from .hashing import hasher
 
+# Note that the columns refer to the opposite tables: 'role_id' holds the user
 UserRole = db.Table(
     'user_role',
-    db.Column('user_id', db.Integer, db.ForeignKey('role.id')),
-    db.Column('role_id', db.Integer, db.ForeignKey('user.id'))
+    db.Column('user_id', db.Integer, db.ForeignKey('role.id'), primary_key=True),
+    db.Column('role_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Index('ix_user_role_role_user', 'role_id', 'user_id')
 )
 
 Followers = db.Table(
     'followers',
-    db.Column('follower_id', db.Integer, db.ForeignKey('user.id')),
-    db.Column('followed_id', db.Integer, db.ForeignKey('user.id'))
+    db.Column('follower_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Column('followed_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Index('ix_followers_followed_follower', 'followed_id', 'follower_id')
 )
 
 
@@ -28,6 +37,9 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
     about_me = db.Column(db.String(128))
     last_seen = db.Column(db.DateTime, default=datetime.now)
+    followers_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    following_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    posts_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     posts = db.relationship(
         'Post',
@@ -57,10 +69,10 @@ class User(UserMixin, db.Model):
 
     @password.setter
     def password(self, plaintext: str) -> None:
-        self.password_hash = bcrypt.generate_password_hash(plaintext).decode('utf-8')
+        self.password_hash = hasher.hash(plaintext)
 
     def verify_password(self, password: str) -> bool:
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
 
     def generate_token(self, expires_sec: int = 1800) -> str:
         s = Serializer(current_app.config['SECRET_KEY'], expires_sec)
@@ -75,21 +87,47 @@ class User(UserMixin, db.Model):
             return None
         return User.query.get(user_id)
 
+    @property
+    def role_ids(self) -> FrozenSet[int]:
+        cached = getattr(self, '_role_ids', None)
+        if cached is not None and 'roles' not in self.__dict__:
+            return cached
+        return frozenset(role.id for role in self.roles)
+
     def has_role(self, name: str) -> bool:
-        role = Role.query.filter_by(name=name).first()
-        return True if role in self.roles else False
+        return role_registry.id_of(name) in self.role_ids
 
     def follow(self, user):
         if not self.is_following(user):
             self.followed.append(user)
+            # incremented by the UPDATE itself, concurrent follows cannot lose a count
+            self.following_count = User.following_count + 1
+            user.followers_count = User.followers_count + 1
 
     def unfollow(self, user):
         if self.is_following(user):
             self.followed.remove(user)
+            self.following_count = User.following_count - 1
+            user.followers_count = User.followers_count - 1
 
     def is_following(self, user):
-        return self.followed.filter(
-            Followers.c.followed_id == user.id).count() > 0
+        return db.session.query(exists().where(
+            Followers.c.follower_id == self.id).where(
+                Followers.c.followed_id == user.id)).scalar()
+
+    def following_ids(self, users: Iterable['User']) -> Set[int]:
+        """Returns which of the 'users' are followed, in a single query."""
+
+        ids = {user.id for user in users}
+        if not ids:
+            return set()
+        rows = db.session.query(Followers.c.followed_id).filter(
+            Followers.c.follower_id == self.id).filter(
+                Followers.c.followed_id.in_(ids))
+        return {followed_id for followed_id, in rows}
+
+    def count_post(self, delta: int = 1) -> None:
+        self.posts_count = User.posts_count + delta
 
     def followed_posts(self):
         followed = Post.query.join(
@@ -102,9 +140,76 @@ class User(UserMixin, db.Model):
         return f'User #{self.id} <{self.username}: {self.email}>'
 
 
+UNCACHED = {'password_hash', 'followers_count', 'following_count', 'posts_count'}
+
+
+def recount_users():
+    """Returns an UPDATE setting every counter of every user from scratch."""
+
+    table = User.__table__
+
+    def count(column):
+        return db.select([db.func.count()]).where(column == table.c.id).as_scalar()
+
+    return table.update().values(
+        followers_count=count(Followers.c.followed_id),
+        following_count=count(Followers.c.follower_id),
+        posts_count=count(Post.__table__.c.user_id)
+    )
+
+
+class IdentityCache:
+    """
+    Caches the core columns and role ids of authenticated users, so that
+    'load_user' rarely queries. Entries live for 'IDENTITY_CACHE_TTL'
+    seconds in an LRU of 'IDENTITY_CACHE_SIZE' users per process; within
+    a request the session identity map serves any further load. Views
+    changing a user must call 'invalidate' after committing.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('IDENTITY_CACHE_SIZE', 1024)
+        app.config.setdefault('IDENTITY_CACHE_TTL', 60)
+        app.extensions['identity'] = LRUCache(
+            maxsize=app.config['IDENTITY_CACHE_SIZE'],
+            ttl=app.config['IDENTITY_CACHE_TTL']
+        )
+
+    @property
+    def cache(self) -> LRUCache:
+        return current_app.extensions['identity']
+
+    @staticmethod
+    def _columns(user: User) -> dict:
+        # counters change on other users' requests, they are loaded when read
+        return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs
+                if attr.key not in UNCACHED}
+
+    def load(self, user_id: int) -> Optional[User]:
+        entry = self.cache.get(user_id)
+        if entry is None:
+            user = User.query.options(joinedload(User.roles)).get(user_id)
+            if user is not None:
+                self.cache.set(user_id, (self._columns(user), user.role_ids))
+            return user
+
+        columns, role_ids = entry
+        user = User(**columns)
+        make_transient_to_detached(user)
+        user = db.session.merge(user, load=False)
+        user._role_ids = role_ids
+        return user
+
+    def invalidate(self, user_id: int) -> None:
+        self.cache.pop(user_id)
+
+
+identity_cache = IdentityCache()
+
+
 @login_manager.user_loader
 def load_user(user_id: int) -> User:
-    return User.query.get(user_id)
+    return identity_cache.load(int(user_id))
 
 
 class Role(db.Model):
@@ -116,18 +221,83 @@ class Role(db.Model):
         return f'Role #{self.id} <{self.name}: {self.description}>'
 
 
+class RoleRegistry:
+    """
+    Per-application cache of the role name -> id map, so role checks do
+    not query the database. It is dropped whenever a role is committed by
+    this process and reloaded at least every 'ROLES_CACHE_TTL' seconds to
+    pick up roles written by other processes (e.g. 'flask create-roles').
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('ROLES_CACHE_TTL', 300)
+        app.extensions['roles'] = {'ids': None, 'loaded': 0.0}
+
+    def id_of(self, name: str) -> Optional[int]:
+        state = current_app.extensions['roles']
+        ids = state['ids']
+        if ids is None or monotonic() - state['loaded'] > current_app.config['ROLES_CACHE_TTL']:
+            ids = dict(db.session.query(Role.name, Role.id))
+            state['ids'], state['loaded'] = ids, monotonic()
+        return ids.get(name)
+
+    def invalidate(self) -> None:
+        current_app.extensions['roles']['ids'] = None
+
+
+role_registry = RoleRegistry()
+
+
+@event.listens_for(Session, 'after_flush')
+def track_roles(session, context):
+    if any(isinstance(obj, Role) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info['roles_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_roles(session):
+    if session.info.pop('roles_changed', False) and has_app_context():
+        role_registry.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def forget_roles(session):
+    session.info.pop('roles_changed', None)
+
+
 PostTag = db.Table(
     'post_tag',
-    db.Column('post_id', db.Integer, db.ForeignKey('post.id')),
-    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'))
+    db.Column('post_id', db.Integer, db.ForeignKey('post.id'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True),
+    db.Index('ix_post_tag_tag_post', 'tag_id', 'post_id')
+)
+
+Timeline = db.Table(
+    'timeline',
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Column('post_id', db.Integer, db.ForeignKey('post.id'), primary_key=True),
+    db.Column('date', db.DateTime, nullable=False),
+    db.Index('ix_timeline_user_date_post', 'user_id', 'date', 'post_id')
 )
 
 
 class Post(db.Model):
+    __table_args__ = (
+        db.Index('ix_post_date_id', 'date', 'id'),
+        db.Index('ix_post_user_date_id', 'user_id', 'date', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(128), nullable=False)
     date = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
     content = db.Column(db.Text, nullable=False)
+    excerpt = db.Column(db.Text)
+    # the content with its code highlighted, None if it has no code
+    content_html = db.Column(db.Text)
+    # the content of a post not given an excerpt yet, read by listings
+    # along with the page instead of the deferred 'content'
+    unexcerpted = query_expression()
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
     tags = db.relationship(
@@ -145,6 +315,12 @@ class Tag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), unique=True, nullable=False)
 
+    @staticmethod
+    def normalize(name: str) -> str:
+        """The name a tag is stored under: case-folded, with single spaces."""
+
+        return ' '.join(name.split()).casefold()[:Tag.name.type.length]
+
     def __repr__(self):
         return f'Tag #{self.id} <{self.name}>'
 
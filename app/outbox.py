@@ -0,0 +1,218 @@
+"""
+
+Delivers mail from a bounded outbox instead of a thread per message.
+
+A fixed pool of 'MAIL_OUTBOX_WORKERS' threads drains the outbox, each
+sending up to 'MAIL_OUTBOX_BATCH' queued messages over a single SMTP
+connection. A message failing to send is retried with exponential
+backoff up to 'MAIL_OUTBOX_RETRIES' times, the rest of its batch is
+sent regardless.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import atexit
+import queue
+import smtplib
+import threading
+from time import monotonic
+from collections import deque
+from typing import Any, Dict
+
+from flask import current_app
+from flask_mail import Message
+
+from .extensions import mail, PerProcess
+
+# errors leaving the SMTP connection unusable for the next messages
+BROKEN = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class _Envelope:
+    __slots__ = ('message', 'queued', 'attempts')
+
+    def __init__(self, message: Message):
+        self.message = message
+        self.queued = monotonic()
+        self.attempts = 0
+
+
+class _Outbox:
+    def __init__(self, app):
+        self.app = app
+        self.queue = queue.Queue(maxsize=app.config['MAIL_OUTBOX_SIZE'])
+        self.latencies = deque(maxlen=1000)
+        self.sent = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+        self.workers = PerProcess(self._start)
+
+    def put(self, envelope: _Envelope) -> None:
+        self.workers.ensure()
+        self.queue.put_nowait(envelope)
+
+    def _start(self) -> list:
+        workers = [
+            threading.Thread(target=self._run, name=f'outbox-{number}', daemon=True)
+            for number in range(self.app.config['MAIL_OUTBOX_WORKERS'])
+        ]
+        for worker in workers:
+            worker.start()
+        return workers
+
+    def _batch(self):
+        """Waits for messages, returns up to a batch and whether to stop."""
+
+        batch = []
+        envelope = self.queue.get()
+        while envelope is not None:
+            batch.append(envelope)
+            if len(batch) >= self.app.config['MAIL_OUTBOX_BATCH']:
+                break
+            try:
+                envelope = self.queue.get_nowait()
+            except queue.Empty:
+                break
+        return batch, envelope is None
+
+    def _run(self) -> None:
+        while True:
+            batch, stop = self._batch()
+            try:
+                if batch:
+                    self._deliver(batch)
+            except Exception:
+                # the worker must outlive whatever a batch raises
+                self.app.logger.exception('Could not deliver %d messages', len(batch))
+            if stop:
+                return
+
+    def _deliver(self, batch: list) -> None:
+        with self.app.app_context():
+            connected = False
+            try:
+                with mail.connect() as connection:
+                    connected = True
+                    while batch:
+                        envelope = batch.pop(0)
+                        try:
+                            connection.send(envelope.message)
+                        except Exception as error:
+                            self.app.logger.exception('Could not deliver message %r', envelope.message.subject)
+                            self._retry(envelope)
+                            if isinstance(error, BROKEN):
+                                break
+                        else:
+                            self._delivered(envelope)
+            except Exception:
+                self.app.logger.exception('Could not %s the mail server',
+                                          'disconnect from' if connected else 'connect to')
+            # messages left behind by a broken connection were not tried, they
+            # go back to the outbox; none was tried if it could not connect
+            for envelope in batch:
+                if connected:
+                    self._requeue(envelope)
+                else:
+                    self._retry(envelope)
+
+    def _delivered(self, envelope: _Envelope) -> None:
+        with self.lock:
+            self.sent += 1
+            self.latencies.append(monotonic() - envelope.queued)
+
+    def _requeue(self, envelope: _Envelope) -> None:
+        try:
+            self.queue.put_nowait(envelope)
+        except queue.Full:
+            self._drop(envelope)
+
+    def _retry(self, envelope: _Envelope) -> None:
+        envelope.attempts += 1
+        if envelope.attempts > self.app.config['MAIL_OUTBOX_RETRIES']:
+            self._drop(envelope)
+            return
+        delay = self.app.config['MAIL_OUTBOX_BACKOFF'] * 2 ** (envelope.attempts - 1)
+        timer = threading.Timer(delay, self._requeue, args=(envelope,))
+        timer.daemon = True
+        timer.start()
+
+    def _drop(self, envelope: _Envelope) -> None:
+        with self.lock:
+            self.failed += 1
+        self.app.logger.error(
+            'Dropped message %r to %s after %d attempts',
+            envelope.message.subject, envelope.message.recipients, envelope.attempts
+        )
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Lets the workers send what is queued, waiting at most 'timeout' seconds."""
+
+        if not self.workers.started:
+            return
+        workers = self.workers.value
+        deadline = monotonic() + timeout
+        for _ in workers:
+            try:
+                self.queue.put(None, timeout=max(0.0, deadline - monotonic()))
+            except queue.Full:
+                break
+        for worker in workers:
+            worker.join(max(0.0, deadline - monotonic()))
+        if not self.queue.empty():
+            self.app.logger.warning('Outbox closed with %d unsent messages', self.queue.qsize())
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            sent, failed = self.sent, self.failed
+
+        def percentile(rank):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * rank))] if latencies else None
+
+        return {
+            'depth': self.queue.qsize(),
+            'sent': sent,
+            'failed': failed,
+            'latency_p50': percentile(0.50),
+            'latency_p95': percentile(0.95)
+        }
+
+
+class Outbox:
+    """Flask extension queueing messages for the delivery workers."""
+
+    def init_app(self, app):
+        app.config.setdefault('MAIL_OUTBOX_SIZE', 1000)
+        app.config.setdefault('MAIL_OUTBOX_WORKERS', 2)
+        app.config.setdefault('MAIL_OUTBOX_BATCH', 20)
+        app.config.setdefault('MAIL_OUTBOX_RETRIES', 3)
+        app.config.setdefault('MAIL_OUTBOX_BACKOFF', 1.0)
+        box = _Outbox(app)
+        app.extensions['outbox'] = box
+        atexit.register(box.close)
+
+    def send(self, message: Message) -> bool:
+        """
+        Queues a message for delivery.
+
+        :return: False if the outbox is full and the message was dropped
+        """
+
+        try:
+            current_app.extensions['outbox'].put(_Envelope(message))
+        except queue.Full:
+            current_app.logger.error('Outbox full, dropped message %r', message.subject)
+            return False
+        return True
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, delivery counters and latencies in seconds."""
+
+        return current_app.extensions['outbox'].stats()
+
+
+outbox = Outbox()
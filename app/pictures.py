@@ -0,0 +1,215 @@
+"""
+
+Processes uploaded profile pictures in the background.
+
+Uploads are spooled to disk by the request and handed to a worker
+thread, which renders every size in 'SIZES' as JPEG and WebP. Files are
+named after the digest of the upload, so identical uploads are stored
+once. Only when all of them are written does the worker switch
+'User.image_file', in a single UPDATE.
+
+Every process starts its worker with its first request, and the worker
+looks through the spool then and every 'PICTURES_RECOVER_INTERVAL'
+seconds for uploads left behind, including those a crashed process had
+claimed more than 'PICTURES_STALE_AFTER' seconds ago.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import os
+import queue
+import secrets
+import hashlib
+import threading
+from time import time
+from contextlib import suppress
+from typing import Optional
+
+from PIL import Image, ImageOps
+from flask import current_app, url_for
+
+from .extensions import db, PerProcess
+from .models import User, identity_cache
+from .fragments import fragments
+
+SIZES = (64, 125, 250)
+CANONICAL_SIZE = 125
+FORMATS = {'jpg': 'JPEG', 'webp': 'WEBP'}
+DEFAULT = 'default.jpg'
+
+
+class PictureRejected(Exception):
+    pass
+
+
+def variant(image_file: str, size: int = CANONICAL_SIZE, ext: str = 'jpg') -> str:
+    """
+    Names the file of a picture in another size or format. 'image_file'
+    is the canonical JPEG, e.g. '<digest>.jpg' -> '<digest>-64.webp'.
+    Pictures uploaded before the pipeline only exist in one version.
+    """
+
+    digest, current = os.path.splitext(image_file)
+    if image_file == DEFAULT or current != '.jpg' or len(digest) != 32:
+        return image_file
+    return f'{digest}.{ext}' if size == CANONICAL_SIZE else f'{digest}-{size}.{ext}'
+
+
+def profile_picture(image_file: str, size: int = CANONICAL_SIZE, ext: str = 'jpg') -> str:
+    return url_for('static', filename='images/profile_pics/' + variant(image_file, size, ext))
+
+
+def _digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b''):
+            sha.update(chunk)
+    return sha.hexdigest()[:32]
+
+
+def render(path: str, directory: str, digest: str, max_pixels: int) -> None:
+    """Writes every variant of the spooled upload, the canonical one last."""
+
+    try:
+        with Image.open(path) as image:
+            if image.width * image.height > max_pixels:
+                raise PictureRejected(f'{image.width}x{image.height} pixels')
+            # JPEGs are decoded straight at the smallest scale still big enough
+            image.draft('RGB', (max(SIZES), max(SIZES)))
+            image = ImageOps.exif_transpose(image).convert('RGB')
+    except (OSError, Image.DecompressionBombError) as error:
+        raise PictureRejected(str(error))
+
+    for size in sorted(SIZES, key=lambda size: size == CANONICAL_SIZE):
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size), Image.LANCZOS)
+        for ext, fmt in FORMATS.items():
+            target = os.path.join(directory, variant(f'{digest}.jpg', size, ext))
+            temporary = f'{target}.{secrets.token_hex(4)}.tmp'
+            thumbnail.save(temporary, fmt, quality=85)
+            os.replace(temporary, target)
+
+
+class _Worker:
+    def __init__(self, app):
+        self.app = app
+        self.spool = app.config['PICTURES_SPOOL_DIR']
+        self.directory = os.path.join(app.root_path, 'static', 'images', 'profile_pics')
+        self.queue = queue.Queue()
+        self.thread = PerProcess(self._start)
+
+    def start(self) -> None:
+        self.thread.ensure()
+
+    def put(self, path: str) -> None:
+        self.start()
+        self.queue.put(path)
+
+    def _start(self) -> None:
+        threading.Thread(target=self._run, name='pictures', daemon=True).start()
+        self._recover()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                path = self.queue.get(timeout=self.app.config['PICTURES_RECOVER_INTERVAL'])
+            except queue.Empty:
+                path = None
+            try:
+                if path is None:
+                    self._recover()
+                else:
+                    self.process(path)
+            except Exception:
+                self.app.logger.exception('Could not process the picture %s', path)
+
+    def _recover(self) -> None:
+        """Queues again the uploads left in the spool, by any process."""
+
+        if not os.path.isdir(self.spool):
+            return
+        stale = time() - self.app.config['PICTURES_STALE_AFTER']
+        found = []
+        for name in os.listdir(self.spool):
+            path = os.path.join(self.spool, name)
+            try:
+                modified = os.path.getmtime(path)
+                if name.endswith('.processing'):
+                    if modified >= stale:
+                        continue
+                    # claimed by a process that died while processing it, claim it back
+                    upload = path[:-len('.processing')] + '.upload'
+                    os.rename(path, upload)
+                    path = upload
+                elif not name.endswith('.upload'):
+                    continue
+            except FileNotFoundError:
+                continue
+            found.append((modified, path))
+        for _, path in sorted(found):
+            self.queue.put(path)
+
+    def process(self, upload: str) -> Optional[str]:
+        user_id = int(os.path.basename(upload).split('-', 1)[0])
+        # claim the upload, another process may be recovering the same spool
+        path = upload[:-len('.upload')] + '.processing'
+        try:
+            os.rename(upload, path)
+            # the claim dates from now, it is stale once processing took too long
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        try:
+            digest = _digest(path)
+            image_file = f'{digest}.jpg'
+            # the canonical file is written last, its presence means the set is complete
+            if not os.path.exists(os.path.join(self.directory, image_file)):
+                render(path, self.directory, digest, self.app.config['PICTURES_MAX_PIXELS'])
+        except PictureRejected as error:
+            self.app.logger.warning('Rejected the picture of user #%d: %s', user_id, error)
+            return None
+        finally:
+            # gone if another process took it back as stale meanwhile
+            with suppress(FileNotFoundError):
+                os.remove(path)
+
+        with self.app.app_context():
+            db.session.execute(
+                User.__table__.update().where(
+                    User.__table__.c.id == user_id).values(image_file=image_file)
+            )
+            db.session.commit()
+            identity_cache.invalidate(user_id)
+            fragments.invalidate_author(user_id)
+        return image_file
+
+
+class ProfilePictures:
+    """Flask extension spooling profile pictures for the background worker."""
+
+    def init_app(self, app):
+        app.config.setdefault('PICTURES_SPOOL_DIR', os.path.join(app.instance_path, 'spool'))
+        app.config.setdefault('PICTURES_MAX_PIXELS', 25_000_000)
+        app.config.setdefault('PICTURES_RECOVER_INTERVAL', 300)
+        app.config.setdefault('PICTURES_STALE_AFTER', 600)
+        worker = _Worker(app)
+        app.extensions['pictures'] = worker
+        app.add_template_global(profile_picture)
+        # uploads left behind are processed without waiting for a new one
+        app.before_request(worker.start)
+
+    def submit(self, user: User, upload) -> None:
+        """Spools an uploaded 'FileStorage' and queues it for processing."""
+
+        worker = current_app.extensions['pictures']
+        os.makedirs(worker.spool, exist_ok=True)
+        path = os.path.join(worker.spool, f'{user.id}-{secrets.token_hex(8)}.upload')
+        upload.save(path)
+        worker.put(path)
+
+
+pictures = ProfilePictures()
@@ -0,0 +1,85 @@
+"""
+
+Derives what listings show of a post from its content, once when the
+post is written rather than on every view.
+
+The excerpt is the beginning of the post's text, stripped of every tag,
+so it is safe to render escaped and its size is bounded whatever the
+size of the post. Posts written before the excerpt existed have none
+until 'flask build-excerpts' is run.
+
+Code blocks inserted by the code snippet plugin of CKEditor are
+highlighted with Pygments into 'Post.content_html', left empty for posts
+without code. The markup only refers to CSS classes, so changing
+'HIGHLIGHT_STYLE' changes the stylesheet alone; 'flask render-posts'
+renders the posts again after upgrading Pygments or changing the markup.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import re
+from html import unescape
+from functools import lru_cache
+from typing import Optional
+
+from flask import current_app
+from pygments import highlight as pygmentize
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+from pygments.lexers.special import TextLexer
+from pygments.util import ClassNotFound
+
+from .search import plain_text
+
+HIGHLIGHT_CLASS = 'highlight'
+CODE_BLOCK_RE = re.compile(r'<pre[^>]*>\s*<code([^>]*)>(.*?)</code>\s*</pre>', re.DOTALL | re.IGNORECASE)
+# the language is one of the classes of the code element, e.g. "language-python hljs"
+LANGUAGE_RE = re.compile(r'''(?<![\w-])class\s*=\s*["'][^"']*?(?<![\w-])language-([\w+#.-]+)''', re.IGNORECASE)
+
+
+def excerpt(html: str, length: int = None) -> str:
+    """
+    Returns the first 'length' characters of the text of 'html', cut at
+    a word boundary and followed by an ellipsis when truncated.
+    """
+
+    length = length or current_app.config.get('EXCERPT_LENGTH', 300)
+    text = plain_text(html)
+    if len(text) <= length:
+        return text
+    # the character after the limit tells whether the last word is whole
+    cut = text[:length + 1]
+    if ' ' in cut:
+        cut = cut.rsplit(' ', 1)[0]
+    return cut[:length].rstrip(' .,;:!?-') + '…'
+
+
+def _highlight_block(match) -> str:
+    attributes, code = match.groups()
+    language = LANGUAGE_RE.search(attributes)
+    language = language and language.group(1)
+    try:
+        lexer = get_lexer_by_name(language) if language else TextLexer()
+    except ClassNotFound:
+        lexer = TextLexer()
+    return pygmentize(unescape(code), lexer, HtmlFormatter(cssclass=HIGHLIGHT_CLASS))
+
+
+def highlight(html: str) -> Optional[str]:
+    """
+    Returns 'html' with its code blocks highlighted, or None if it has
+    none and can be served as it is.
+    """
+
+    if '<pre' not in html:
+        return None
+    rendered, blocks = CODE_BLOCK_RE.subn(_highlight_block, html)
+    return rendered if blocks else None
+
+
+@lru_cache(maxsize=8)
+def highlight_css(style: str) -> str:
+    return HtmlFormatter(style=style).get_style_defs(f'.{HIGHLIGHT_CLASS}')
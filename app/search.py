@@ -0,0 +1,379 @@
+"""
+
+Defines the full-text search index over posts.
+
+On SQLite the index is an FTS5 virtual table ranked with bm25, on every
+other backend (or a SQLite build without FTS5) it falls back to an
+in-process inverted index. Both are kept in sync explicitly by the
+'posts' blueprint and can be rebuilt from scratch with 'flask reindex'.
+The FTS5 table is written in the transaction of the post, the memory
+index once that transaction commits.
+
+A listing searches within its own posts (a tag, a user, a timeline):
+'SEARCH_MAX_RESULTS' bounds the best matches among them, not among
+every post.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import re
+import math
+import threading
+from bisect import bisect_left
+from functools import partial
+from collections import defaultdict
+from html.parser import HTMLParser
+from typing import List, Optional
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from flask import current_app
+
+from .extensions import db
+from .models import Post
+
+TOKEN_RE = re.compile(r'\w+')
+TITLE_WEIGHT = 10.0
+
+
+class _TextExtractor(HTMLParser):
+    SKIPPED = {'script', 'style'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        self.skipping += tag in self.SKIPPED
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED and self.skipping:
+            self.skipping -= 1
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+
+def plain_text(html: str) -> str:
+    """Strips the markup of a CKEditor document, leaving only its text."""
+
+    parser = _TextExtractor()
+    parser.feed(html or '')
+    parser.close()
+    return ' '.join(' '.join(parser.parts).split())
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class FTS5Backend:
+    """Search over the 'post_search' FTS5 table, whose rowid is the post id."""
+
+    name = 'fts5'
+
+    @staticmethod
+    def supported(connection) -> bool:
+        """Whether SQLite was built with FTS5."""
+
+        options = connection.execute(sa.text('PRAGMA compile_options'))
+        return any(option == 'ENABLE_FTS5' for option, in options)
+
+    @staticmethod
+    def exists(connection) -> bool:
+        return connection.execute(sa.text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'post_search'"
+        )).scalar() is not None
+
+    @staticmethod
+    def create(connection) -> None:
+        connection.execute(sa.text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS post_search "
+            "USING fts5(title, content, prefix='2 3')"
+        ))
+
+    def remove(self, post_id: int) -> None:
+        db.session.execute(
+            sa.text('DELETE FROM post_search WHERE rowid = :id'),
+            {'id': post_id}
+        )
+
+    def add(self, post_id: int, title: str, content: str) -> None:
+        self.remove(post_id)
+        db.session.execute(
+            sa.text('INSERT INTO post_search (rowid, title, content) '
+                    'VALUES (:id, :title, :content)'),
+            {'id': post_id, 'title': title, 'content': content}
+        )
+
+    def clear(self) -> None:
+        db.session.execute(sa.text('DELETE FROM post_search'))
+
+    @staticmethod
+    def drop() -> None:
+        with db.engine.begin() as connection:
+            connection.execute(sa.text('DROP TABLE IF EXISTS post_search'))
+
+    def filter(self, posts, terms: List[str], limit: int, scoped: bool):
+        match = sa.text('post_search MATCH :match').bindparams(match=' '.join(f'"{term}"*' for term in terms))
+        if scoped:
+            # ranked within the listing, or its posts could all rank below the
+            # limit; the unary + keeps SQLite from scanning the listing first
+            scope = posts.with_entities(Post.id.label('id')).order_by(None).subquery()
+            match = sa.and_(match, sa.literal_column('+rowid').in_(sa.select([scope.c.id])))
+        ranked = sa.select([
+            sa.literal_column('rowid').label('post_id'),
+            sa.literal_column(f'bm25(post_search, {TITLE_WEIGHT}, 1.0)').label('rank')
+        ]).select_from(
+            sa.table('post_search')
+        ).where(
+            match
+        ).order_by(
+            sa.literal_column('rank')
+        ).limit(limit).alias('ranked')
+        return posts.join(ranked, ranked.c.post_id == Post.id).order_by(ranked.c.rank)
+
+
+class MemoryBackend:
+    """
+    Inverted index held in the memory of the current process. Note that
+    every worker process keeps its own copy, so it is only in sync with
+    the writes made through that process.
+    """
+
+    name = 'memory'
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.postings = defaultdict(dict)
+        self.tokens = {}
+        self.lengths = {}
+        # the sorted tokens, to find those starting with a term by bisection
+        self.vocabulary = None
+
+    def remove(self, post_id: int) -> None:
+        with self.lock:
+            self.lengths.pop(post_id, None)
+            for token in self.tokens.pop(post_id, ()):
+                documents = self.postings[token]
+                documents.pop(post_id, None)
+                if not documents:
+                    del self.postings[token]
+                    self.vocabulary = None
+
+    def add(self, post_id: int, title: str, content: str) -> None:
+        frequencies = defaultdict(float)
+        for token in tokenize(title):
+            frequencies[token] += TITLE_WEIGHT
+        for token in tokenize(content):
+            frequencies[token] += 1.0
+
+        with self.lock:
+            self.remove(post_id)
+            for token, frequency in frequencies.items():
+                if token not in self.postings:
+                    self.vocabulary = None
+                self.postings[token][post_id] = frequency
+            self.tokens[post_id] = set(frequencies)
+            self.lengths[post_id] = sum(frequencies.values())
+
+    def clear(self) -> None:
+        with self.lock:
+            self.postings.clear()
+            self.tokens.clear()
+            self.lengths.clear()
+            self.vocabulary = None
+
+    def _starting_with(self, term: str) -> List[str]:
+        if self.vocabulary is None:
+            self.vocabulary = sorted(self.postings)
+        tokens = []
+        for token in self.vocabulary[bisect_left(self.vocabulary, term):]:
+            if not token.startswith(term):
+                break
+            tokens.append(token)
+        return tokens
+
+    def rank(self, terms: List[str], limit: Optional[int] = None,
+             k1: float = 1.2, b: float = 0.75) -> List[int]:
+        """Ranks the posts containing every term (as a prefix) with bm25."""
+
+        with self.lock:
+            total = len(self.lengths)
+            if not total:
+                return []
+            average = sum(self.lengths.values()) / total
+
+            scores = None
+            for term in terms:
+                matches = defaultdict(float)
+                for token in self._starting_with(term):
+                    documents = self.postings[token]
+                    idf = math.log(1 + (total - len(documents) + 0.5) / (len(documents) + 0.5))
+                    for post_id, frequency in documents.items():
+                        norm = k1 * (1 - b + b * self.lengths[post_id] / average)
+                        matches[post_id] += idf * frequency * (k1 + 1) / (frequency + norm)
+
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {post_id: score + matches[post_id]
+                              for post_id, score in scores.items() if post_id in matches}
+                if not scores:
+                    return []
+
+        return sorted(scores, key=lambda post_id: (-scores[post_id], -post_id))[:limit]
+
+    def filter(self, posts, terms: List[str], limit: int, scoped: bool):
+        ids = self.rank(terms)
+        if ids and scoped:
+            # the best matches among the posts of the listing, not among every post
+            listed = {post_id for post_id, in posts.with_entities(Post.id).order_by(None)}
+            ids = [post_id for post_id in ids if post_id in listed]
+        ids = ids[:limit]
+        if not ids:
+            return posts.filter(sa.false())
+        order = sa.case({post_id: position for position, post_id in enumerate(ids)}, value=Post.id)
+        return posts.filter(Post.id.in_(ids)).order_by(order)
+
+
+class SearchIndex:
+    """
+    Flask extension choosing and holding the search backend of an application.
+
+    The backend is picked on first use, because it needs a database
+    connection: 'SEARCH_BACKEND' may force 'fts5' or 'memory', by default
+    FTS5 is used whenever the database is SQLite, supports it and has the
+    'post_search' table. The table is created by the migrations and by
+    'create', never while serving a request.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('SEARCH_BACKEND', 'auto')
+        app.config.setdefault('SEARCH_MAX_RESULTS', 500)
+        app.extensions['search'] = {'lock': threading.Lock(), 'backend': None}
+
+    @property
+    def backend(self):
+        state = current_app.extensions['search']
+        if state['backend'] is None:
+            with state['lock']:
+                if state['backend'] is None:
+                    state['backend'] = self._load_backend()
+        return state['backend']
+
+    def _choose(self):
+        choice = current_app.config['SEARCH_BACKEND']
+        if choice != 'memory' and db.engine.dialect.name == 'sqlite':
+            if not FTS5Backend.supported(db.session):
+                reason = 'SQLite built without FTS5'
+            elif not FTS5Backend.exists(db.session):
+                reason = "No 'post_search' table, run 'flask db upgrade'"
+            else:
+                return FTS5Backend()
+            if choice == 'fts5':
+                raise RuntimeError(reason)
+            current_app.logger.warning(f'{reason}, searching in memory')
+        return MemoryBackend()
+
+    def _load_backend(self):
+        backend = self._choose()
+        if isinstance(backend, MemoryBackend):
+            self._fill(backend)
+        return backend
+
+    @staticmethod
+    def _fill(backend, batch: int = 1000) -> int:
+        rows = db.session.query(Post.id, Post.title, Post.content).yield_per(batch)
+        count = 0
+        for count, (post_id, title, content) in enumerate(rows, start=1):
+            backend.add(post_id, title, plain_text(content))
+        return count
+
+    def _write(self, func, *args) -> None:
+        if isinstance(self.backend, MemoryBackend):
+            # it cannot be rolled back, the change waits for the commit
+            db.session.info.setdefault('search_pending', []).append(partial(func, *args))
+        else:
+            func(*args)
+
+    def add(self, post: Post) -> None:
+        """Indexes a new or an updated post. The post must already have an id."""
+
+        self._write(self.backend.add, post.id, post.title, plain_text(post.content))
+
+    def remove(self, post: Post) -> None:
+        self._write(self.backend.remove, post.id)
+
+    def create(self) -> None:
+        """
+        Creates the FTS5 table if it is to be used. Call it along with
+        the tables of the models, outside of any transaction writing to
+        the database, since it waits for SQLite's write lock.
+        """
+
+        with db.engine.begin() as connection:
+            self._create(connection)
+
+    def _create(self, connection) -> None:
+        if (current_app.config['SEARCH_BACKEND'] != 'memory'
+                and db.engine.dialect.name == 'sqlite' and FTS5Backend.supported(connection)):
+            FTS5Backend.create(connection)
+
+    def shared(self) -> bool:
+        """Whether the index is kept in the database rather than in the memory of every process."""
+
+        return isinstance(self._choose(), FTS5Backend)
+
+    def drop(self) -> None:
+        """Drops the FTS5 table, which is not one of the models."""
+
+        if db.engine.dialect.name == 'sqlite':
+            FTS5Backend.drop()
+        current_app.extensions['search']['backend'] = None
+
+    def rebuild(self) -> int:
+        """Creates the FTS5 table if missing, drops every indexed post and indexes all the posts again."""
+
+        self._create(db.session)
+        state = current_app.extensions['search']
+        with state['lock']:
+            state['backend'] = backend = self._choose()
+            backend.clear()
+            count = self._fill(backend)
+        db.session.commit()
+        return count
+
+    def filter(self, posts, query: str, scoped: bool = True):
+        """
+        Restricts the 'posts' query to the posts matching every word of
+        the search 'query' and orders them by relevance.
+
+        :param scoped: False when 'posts' are every post, the best matches
+                       then need not be looked for among them
+        """
+
+        terms = tokenize(query)
+        if not terms:
+            return posts
+        return self.backend.filter(posts, terms, current_app.config['SEARCH_MAX_RESULTS'], scoped)
+
+
+search_index = SearchIndex()
+
+
+@event.listens_for(Session, 'after_commit')
+def apply_search_writes(session):
+    for write in session.info.pop('search_pending', ()):
+        write()
+
+
+@event.listens_for(Session, 'after_rollback')
+def forget_search_writes(session):
+    session.info.pop('search_pending', None)
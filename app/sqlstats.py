@@ -0,0 +1,171 @@
+"""
+
+Instruments the SQL statements issued by every request.
+
+Engine events time each statement and count it against the current
+request. After the request, the totals are sent in a 'Server-Timing'
+header and logged. Statements repeated 'SQL_STATS_REPEAT_THRESHOLD'
+times or more (the N+1 pattern) are logged as a warning, with the
+template line or module line that issued them. The last
+'SQL_STATS_WINDOW' requests of every endpoint are summarized in the
+admin.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   -
+
+"""
+
+import os
+import sys
+import threading
+from time import perf_counter
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from .extensions import db
+
+
+def _origin(root: str) -> Optional[str]:
+    """Finds the template line, or else the application line, running a statement."""
+
+    fallback = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        template = frame.f_globals.get('__jinja_template__')
+        if template is not None:
+            return f'{template.name}:{template.get_corresponding_lineno(frame.f_lineno)}'
+        filename = frame.f_code.co_filename
+        if fallback is None and filename.startswith(root) and filename != __file__:
+            fallback = f'{os.path.relpath(filename, os.path.dirname(root))}:{frame.f_lineno}'
+        frame = frame.f_back
+    return fallback
+
+
+class _RequestStats:
+    __slots__ = ('count', 'duration', 'slowest', 'slowest_ms', 'seen', 'origins')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = None
+        self.slowest_ms = 0.0
+        self.seen = {}
+        self.origins = {}
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        if duration >= self.slowest_ms:
+            self.slowest, self.slowest_ms = statement, duration
+        seen = self.seen.get(statement, 0) + 1
+        self.seen[statement] = seen
+        # walking the stack is only worth it once a statement repeats
+        if seen == 2:
+            self.origins[statement] = _origin(current_app.root_path)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int, Optional[str]]]:
+        return [(statement, times, self.origins.get(statement))
+                for statement, times in self.seen.items() if times >= threshold]
+
+
+def _start(conn, cursor, statement, parameters, context, executemany):
+    conn.info['sql_stats_start'] = perf_counter()
+
+
+def _stop(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('sql_stats_start', None)
+    if started is not None and has_request_context():
+        stats = g.get('sql_stats')
+        if stats is not None:
+            stats.record(statement, (perf_counter() - started) * 1000)
+
+
+class QueryStats:
+    """Flask extension instrumenting the SQL statements of requests."""
+
+    def init_app(self, app):
+        app.config.setdefault('SQL_STATS_ENABLED', True)
+        app.config.setdefault('SQL_STATS_REPEAT_THRESHOLD', 3)
+        app.config.setdefault('SQL_STATS_SLOW_MS', 100)
+        app.config.setdefault('SQL_STATS_WINDOW', 100)
+        app.extensions['sql_stats'] = {'lock': threading.Lock(), 'endpoints': {}}
+        if not app.config['SQL_STATS_ENABLED']:
+            return
+
+        engine = db.get_engine(app)
+        event.listen(engine, 'before_cursor_execute', _start)
+        event.listen(engine, 'after_cursor_execute', _stop)
+        app.before_request(self._begin)
+        app.after_request(self._finish)
+
+    @staticmethod
+    def _begin():
+        if request.endpoint != 'static':
+            g.sql_stats = _RequestStats()
+
+    def _finish(self, response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+
+        config = current_app.config
+        response.headers.add(
+            'Server-Timing', f'db;dur={stats.duration:.1f};desc="{stats.count} queries"')
+
+        logger = current_app.logger
+        logger.debug('%s %s: %d queries in %.1f ms', request.method, request.path,
+                     stats.count, stats.duration)
+        if stats.duration >= config['SQL_STATS_SLOW_MS']:
+            logger.warning('%s %s: %.1f ms in the database, slowest statement %.1f ms: %s',
+                           request.method, request.path, stats.duration,
+                           stats.slowest_ms, ' '.join(stats.slowest.split()))
+        repeated = stats.repeated(config['SQL_STATS_REPEAT_THRESHOLD'])
+        for statement, times, origin in repeated:
+            logger.warning('%s %s: statement repeated %d times from %s: %s',
+                           request.method, request.path, times, origin or 'unknown',
+                           ' '.join(statement.split()))
+
+        state = current_app.extensions['sql_stats']
+        with state['lock']:
+            window = state['endpoints'].setdefault(
+                request.endpoint or request.path, deque(maxlen=config['SQL_STATS_WINDOW']))
+            window.append((stats.count, stats.duration, stats.slowest_ms, stats.slowest, repeated))
+        return response
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Summarizes the recent requests of every endpoint, costliest first."""
+
+        state = current_app.extensions['sql_stats']
+        with state['lock']:
+            endpoints = {endpoint: list(window) for endpoint, window in state['endpoints'].items()}
+
+        summary = []
+        for endpoint, requests in endpoints.items():
+            counts = sorted(count for count, *_ in requests)
+            durations = sorted(duration for _, duration, *_ in requests)
+            slowest = max(requests, key=lambda entry: entry[2])
+            repeated = {}
+            for *_, statements in requests:
+                for statement, times, origin in statements:
+                    if times >= repeated.get(statement, (0, None))[0]:
+                        repeated[statement] = (times, origin)
+            summary.append({
+                'endpoint': endpoint,
+                'requests': len(requests),
+                'queries_avg': sum(counts) / len(counts),
+                'queries_max': counts[-1],
+                'db_ms_avg': sum(durations) / len(durations),
+                'db_ms_p95': durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+                'slowest_ms': slowest[2],
+                'slowest': slowest[3],
+                'repeated': [(statement, times, origin)
+                             for statement, (times, origin) in repeated.items()]
+            })
+        return sorted(summary, key=lambda entry: -entry['db_ms_avg'] * entry['requests'])
+
+
+query_stats = QueryStats()
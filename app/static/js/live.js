@@ -0,0 +1,60 @@
+// Prepends the posts written after the listing was rendered, pushed by
+// Server-Sent Events when the browser and the server support them,
+// otherwise polled. When too many were written, asks to reload instead.
+(function () {
+  var feed = document.getElementById('live-posts');
+  if (!feed) {
+    return;
+  }
+  var last = Number(feed.dataset.last);
+  var top = feed.dataset.top;
+  var source = null;
+  var stopped = false;
+
+  function marks() {
+    return '?since=' + last + '&top=' + encodeURIComponent(top);
+  }
+
+  function reload() {
+    stopped = true;
+    if (source) {
+      source.close();
+    }
+    feed.insertAdjacentHTML('afterbegin',
+      '<div class="alert alert-info"><a href="">New posts were written, reload the page to see them</a></div>');
+  }
+
+  function show(update) {
+    if (update.reload) {
+      reload();
+      return;
+    }
+    // newest first: inserting them oldest first keeps that order
+    for (var i = update.posts.length - 1; i >= 0; i--) {
+      feed.insertAdjacentHTML('afterbegin', update.posts[i].html);
+    }
+    last = Math.max(last, update.last);
+    top = update.top || top;
+  }
+
+  function poll() {
+    fetch(feed.dataset.poll + marks(), {credentials: 'same-origin'})
+      .then(function (response) { return response.ok ? response.json() : null; })
+      .then(function (update) { if (update) { show(update); } })
+      .catch(function () {})
+      .then(function () {
+        if (!stopped) {
+          setTimeout(poll, Number(feed.dataset.interval) * 1000);
+        }
+      });
+  }
+
+  if (feed.dataset.stream && window.EventSource) {
+    source = new EventSource(feed.dataset.stream + marks());
+    source.addEventListener('posts', function (event) {
+      show(JSON.parse(event.data));
+    });
+  } else if (window.fetch) {
+    setTimeout(poll, Number(feed.dataset.interval) * 1000);
+  }
+})();
@@ -0,0 +1,100 @@
+"""
+
+Finds or creates tags in bulk.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+from typing import Dict, List
+
+from flask import current_app
+from werkzeug.exceptions import ServiceUnavailable
+from sqlalchemy.orm import make_transient_to_detached
+
+from .bulk import insert_ignore
+from .cache import LRUCache
+from .extensions import db
+from .models import Tag
+
+
+class TagCache:
+    """
+    Flask extension caching the ids of hot tag names per process. Only
+    committed tags are cached, for 'TAG_CACHE_TTL' seconds at most since
+    tags may be deleted by another process.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('TAG_CACHE_SIZE', 4096)
+        app.config.setdefault('TAG_CACHE_TTL', 300)
+        app.extensions['tags'] = LRUCache(
+            maxsize=app.config['TAG_CACHE_SIZE'],
+            ttl=app.config['TAG_CACHE_TTL']
+        )
+
+    @property
+    def cache(self) -> LRUCache:
+        return current_app.extensions['tags']
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+tag_cache = TagCache()
+
+
+class TagsBusy(ServiceUnavailable):
+    description = 'The tags are being created by another request, please try again in a moment'
+
+
+def _attach(tag_id: int, name: str) -> Tag:
+    # a known row, merged into the session without loading it again
+    tag = Tag(id=tag_id, name=name)
+    make_transient_to_detached(tag)
+    return db.session.merge(tag, load=False)
+
+
+def find_or_create(names: List[str]) -> List[Tag]:
+    """
+    Returns the tags of the given names, once each and normalized by
+    'Tag.normalize', creating the missing ones: one IN query for the
+    names not in the cache, one insert for the new names and one IN
+    query for their ids.
+
+    :raise TagsBusy: When tags skipped by the insert, created by another
+                     transaction, cannot be read yet
+    """
+
+    names = [name for name in dict.fromkeys(map(Tag.normalize, names)) if name]
+    cache = tag_cache.cache
+    ids: Dict[str, int] = {}
+    unknown = []
+    for name in names:
+        tag_id = cache.get(name)
+        if tag_id is None:
+            unknown.append(name)
+        else:
+            ids[name] = tag_id
+
+    if unknown:
+        existing = dict(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(unknown)))
+        for name, tag_id in existing.items():
+            cache.set(name, tag_id)
+        ids.update(existing)
+
+        new = [name for name in unknown if name not in existing]
+        if new:
+            # tags created meanwhile by another transaction are skipped
+            insert_ignore(Tag.__table__, [{'name': name} for name in new])
+            ids.update(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(new)))
+            if missing := [name for name in new if name not in ids]:
+                # a snapshot may predate them, a locking read sees the latest rows
+                ids.update(db.session.query(Tag.name, Tag.id).filter(
+                    Tag.name.in_(missing)).with_for_update(read=True))
+                if any(name not in ids for name in missing):
+                    raise TagsBusy()
+
+    return [_attach(ids[name], name) for name in names]
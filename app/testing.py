@@ -0,0 +1,160 @@
+"""
+
+Defines helpers to check the application from tests and benchmarks.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import threading
+import socketserver
+from email import message_from_bytes
+from email.message import Message
+from contextlib import contextmanager
+from typing import List, Iterator, Optional
+
+from sqlalchemy import event
+
+from .extensions import db
+
+
+@contextmanager
+def count_queries() -> Iterator[List[str]]:
+    """
+    Records the SQL statements issued by the application's engine while
+    the block runs. Must be used inside an application context.
+    """
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def login(client, user_id: int) -> None:
+    """Logs the test 'client' in as a user without going through the form."""
+
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+
+def assert_max_queries(client, url: str, maximum: int):
+    """
+    Requests 'url' with the test 'client' and fails if it answers with an
+    error or takes more than 'maximum' SQL statements.
+
+    :return: The response
+    """
+
+    with count_queries() as statements:
+        response = client.get(url)
+
+    assert response.status_code == 200, f'GET {url} answered {response.status}'
+    assert len(statements) <= maximum, (
+        f'GET {url} issued {len(statements)} queries, expected at most {maximum}:\n'
+        + '\n'.join(statements)
+    )
+    return response
+
+
+class MailSink:
+    """
+    Stand-in SMTP server on the local host, collecting every message it
+    receives instead of delivering it. Point 'MAIL_SERVER' and 'MAIL_PORT'
+    at its 'host' and 'port', with TLS and authentication disabled.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.messages: List[Message] = []
+        self.received = threading.Condition()
+        self.server = socketserver.ThreadingTCPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def host(self) -> str:
+        return self.server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.server.serve_forever, name='mail-sink', daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def wait_for(self, count: int, timeout: float = 5.0) -> bool:
+        """Waits until at least 'count' messages arrived, returns whether they did."""
+
+        with self.received:
+            return self.received.wait_for(lambda: len(self.messages) >= count, timeout)
+
+    def wait_for_recipient(self, address: str, timeout: float = 5.0) -> Optional[Message]:
+        """Waits for a message to 'address', returns the latest one or None."""
+
+        def find():
+            return next((message for message in reversed(self.messages)
+                         if address in message.get('To', '')), None)
+
+        with self.received:
+            self.received.wait_for(lambda: find() is not None, timeout)
+            return find()
+
+    def _store(self, data: bytes) -> None:
+        with self.received:
+            self.messages.append(message_from_bytes(data))
+            self.received.notify_all()
+
+    def _handler(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str) -> None:
+                self.wfile.write(line.encode('ascii') + b'\r\n')
+
+            def read_data(self) -> bytes:
+                lines = []
+                for line in iter(self.rfile.readline, b''):
+                    if line in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(line[1:] if line.startswith(b'..') else line)
+                return b''.join(lines)
+
+            def handle(self):
+                self.reply('220 localhost mail sink')
+                for line in iter(self.rfile.readline, b''):
+                    verb = line[:4].upper()
+                    if verb in (b'HELO', b'EHLO', b'MAIL', b'RCPT', b'RSET', b'NOOP'):
+                        self.reply('250 OK')
+                    elif verb == b'DATA':
+                        self.reply('354 End data with <CR><LF>.<CR><LF>')
+                        sink._store(self.read_data())
+                        self.reply('250 OK')
+                    elif verb == b'QUIT':
+                        self.reply('221 Bye')
+                        return
+                    else:
+                        self.reply('502 Command not implemented')
+
+        return Handler
@@ -0,0 +1,130 @@
+"""
+
+Maintains the materialized home timelines (fan-out-on-write).
+
+Every post is copied into the 'timeline' table of its author and of each
+of their followers when it is written, so '/home' becomes a single range
+read over '(user_id, date, post_id)'. Users following more than
+'TIMELINE_MAX_FOLLOWING' people have no materialized timeline at all and
+fall back to 'User.followed_posts' (fan-out-on-read): their rows would be
+written on nearly every post while being the costliest to keep.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import sqlalchemy as sa
+from flask import current_app
+
+from .extensions import db
+from .models import User, Post, Followers, Timeline
+
+COLUMNS = ['user_id', 'post_id', 'date']
+
+
+def _following(user_id):
+    """Selects how many users 'user_id', a column or a value, follows."""
+
+    return sa.select([User.following_count]).where(
+        User.id == user_id).as_scalar()
+
+
+def _limit() -> int:
+    return current_app.config['TIMELINE_MAX_FOLLOWING']
+
+
+def materialized(user: User) -> bool:
+    return (db.session.query(_following(user.id)).scalar() or 0) <= _limit()
+
+
+def home(user: User):
+    """
+    Returns the posts on the home page of 'user' along with the '(date, id)'
+    columns to order and seek them by.
+    """
+
+    if materialized(user):
+        posts = Post.query.join(
+            Timeline, Timeline.c.post_id == Post.id).filter(
+                Timeline.c.user_id == user.id)
+        return posts, (Timeline.c.date, Timeline.c.post_id)
+    return user.followed_posts(), (Post.date, Post.id)
+
+
+def fan_out(post: Post) -> None:
+    """Copies a new post into the timelines of its author and followers."""
+
+    readers = Followers.alias('readers')
+    followers = sa.select([
+        readers.c.follower_id, sa.literal(post.id), sa.literal(post.date)
+    ]).where(
+        readers.c.followed_id == post.user_id
+    ).where(
+        _following(readers.c.follower_id) <= _limit()
+    )
+    author = sa.select([
+        sa.literal(post.user_id), sa.literal(post.id), sa.literal(post.date)
+    ]).where(
+        _following(post.user_id) <= _limit()
+    )
+    db.session.execute(Timeline.insert().from_select(COLUMNS, followers.union_all(author)))
+
+
+def retract(post: Post) -> None:
+    """Removes a post from every timeline, call it before deleting the post."""
+
+    db.session.execute(Timeline.delete().where(Timeline.c.post_id == post.id))
+
+
+def follow(follower: User, followed: User) -> None:
+    """Updates the timeline of 'follower' once the follow has been flushed."""
+
+    following = db.session.query(_following(follower.id)).scalar()
+    if following == _limit() + 1:
+        clear(follower.id)
+    elif following <= _limit():
+        present = sa.select([Timeline.c.post_id]).where(
+            Timeline.c.user_id == follower.id)
+        posts = sa.select([
+            sa.literal(follower.id), Post.id, Post.date
+        ]).where(
+            Post.user_id == followed.id
+        ).where(
+            Post.id.notin_(present)
+        )
+        db.session.execute(Timeline.insert().from_select(COLUMNS, posts))
+
+
+def unfollow(follower: User, followed: User) -> None:
+    """Updates the timeline of 'follower' once the unfollow has been flushed."""
+
+    following = db.session.query(_following(follower.id)).scalar()
+    if following == _limit():
+        rebuild(follower.id)
+    elif following < _limit():
+        posts = sa.select([Post.id]).where(Post.user_id == followed.id)
+        db.session.execute(Timeline.delete().where(
+            Timeline.c.user_id == follower.id).where(
+                Timeline.c.post_id.in_(posts)))
+
+
+def clear(user_id: int) -> None:
+    db.session.execute(Timeline.delete().where(Timeline.c.user_id == user_id))
+
+
+def rebuild(user_id: int) -> None:
+    """Builds the timeline of a user from scratch, if it is materialized."""
+
+    clear(user_id)
+    followed = sa.select([Followers.c.followed_id]).where(
+        Followers.c.follower_id == user_id)
+    posts = sa.select([
+        sa.literal(user_id), Post.id, Post.date
+    ]).where(
+        sa.or_(Post.user_id == user_id, Post.user_id.in_(followed))
+    ).where(
+        _following(user_id) <= _limit()
+    )
+    db.session.execute(Timeline.insert().from_select(COLUMNS, posts))
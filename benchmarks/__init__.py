@@ -0,0 +1,68 @@
+"""
+
+Defines helpers shared by the benchmarks. Run a benchmark as a module
+from the repository root, e.g. 'python -m benchmarks.search'.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import os
+import tempfile
+import statistics
+from time import perf_counter
+from typing import Callable, Dict
+
+os.environ.setdefault('MAIL_PORT', '25')
+
+from config import BaseConfig
+from app import create_app
+from app.extensions import db
+from app.search import search_index
+
+
+def make_app(**settings):
+    """
+    Creates an application bound to a fresh SQLite database in a
+    temporary directory, with the tables already created. Note that the
+    admin views only allow a single application per process.
+
+    :param settings: Overrides configuration variables
+    :return:         Flask application instance
+    """
+
+    path = os.path.join(tempfile.mkdtemp(prefix='educatia-bench-'), 'bench.db')
+    config = type('BenchmarkConfig', (BaseConfig,), {
+        'TESTING': True,
+        'SECRET_KEY': 'benchmark',
+        'HASHING_ROUNDS': 4,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + path,
+        **settings
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        search_index.create()
+    return app
+
+
+def measure(func: Callable, repeat: int = 20, warmup: int = 2) -> Dict[str, float]:
+    """Times 'func' and returns its median, p95 and best run in milliseconds."""
+
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        timings.append((perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        'median_ms': statistics.median(timings),
+        'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        'min_ms': timings[0]
+    }
@@ -0,0 +1,75 @@
+"""
+
+Seeds a synthetic dataset at a configurable scale through the bulk
+loader of 'flask seed', plus an administrator.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   -
+
+"""
+
+import random
+from typing import Dict
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import Role, UserRole, role_registry
+from app.hashing import hasher
+from app.search import search_index
+from app.bulk import BulkLoader, Zipf, synthetic, words
+from app import timeline
+
+__all__ = ['PASSWORD', 'Zipf', 'reset', 'scale', 'seed', 'words']
+
+PASSWORD = 'password'
+
+
+def scale(posts: int) -> Dict[str, int]:
+    """Derives the size of the other tables from the number of posts."""
+
+    users = max(10, posts // 10)
+    return {
+        'users': users,
+        'posts': posts,
+        'tags': max(10, posts // 20),
+        'following': min(50, users - 1)
+    }
+
+
+def reset() -> None:
+    """Empties the database and the caches of the current application."""
+
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    for name in ('identity', 'tags', 'fragments'):
+        current_app.extensions[name].clear()
+    role_registry.invalidate()
+
+
+def seed(users: int, posts: int, tags: int, following: int,
+         tags_per_post: int = 3, rng: random.Random = None) -> None:
+    """
+    Fills an empty database. Every user is named 'user<id>' and has the
+    password 'PASSWORD'; 'user1' is an administrator.
+
+    :param following: How many users each user follows
+    """
+
+    db.session.execute(Role.__table__.insert(), [
+        {'name': 'Admin', 'description': 'Site administrator'},
+        {'name': 'Tutor', 'description': 'Creates and edits posts'},
+        {'name': 'Student', 'description': 'Reads posts'}
+    ])
+    loader = BulkLoader(hasher.hash(PASSWORD))
+    loader.load(synthetic(users, posts, tags, following, tags_per_post, rng))
+    loader.finish()
+    # the columns of 'user_role' are swapped, see 'UserRole'
+    db.session.execute(UserRole.insert(), {'user_id': 1, 'role_id': 1})
+
+    for user_id in range(1, users + 1):
+        timeline.rebuild(user_id)
+    db.session.commit()
+    search_index.rebuild()
@@ -0,0 +1,157 @@
+"""
+
+Times the data-access hot paths at several sizes of the dataset:
+
+    python -m benchmarks.hotpaths --sizes 1000 10000 --output after.json
+    python -m benchmarks.hotpaths --sizes 1000 10000 --baseline before.json
+
+With '--baseline', paths whose median got slower than '--tolerance'
+allows are reported and the exit status is non-zero.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import sys
+import json
+import random
+import sqlite3
+import argparse
+import platform
+from datetime import datetime
+from itertools import count
+from typing import Callable, Dict
+
+from . import make_app, measure
+from .dataset import reset, scale, seed
+from app.extensions import db
+from app.models import User, Post, identity_cache, load_user
+from app.blueprints.main.navigation_tools import paginate, seek, search
+from app.blueprints.posts.routes import make_tags
+from app import timeline
+
+
+def hot_paths(size: Dict[str, int]) -> Dict[str, Callable]:
+    """Returns the functions to time, each running one hot path from a clean session."""
+
+    users = size['users']
+    deep = max(1, size['posts'] // 5 // 2)
+    new_tags = count()
+
+    def user(user_id=2):
+        return db.session.query(User).get(user_id)
+
+    def home():
+        posts, key = timeline.home(user())
+        return paginate(1, posts, key=key).items
+
+    def load_user_missed():
+        identity_cache.invalidate(2)
+        return load_user(2)
+
+    def make_new_tags():
+        make_tags(f'tag1, tag2, new{next(new_tags)}')
+        db.session.flush()
+
+    return {
+        'paginate first': lambda: paginate(1, Post.query).items,
+        'paginate deep': lambda: paginate(deep, Post.query).items,
+        'seek': lambda: seek(Post.query).items,
+        'search': lambda: paginate(1, search(Post.query, 'lorem dolor', scoped=False)).items,
+        'followed_posts': lambda: paginate(1, user().followed_posts()).items,
+        'home': home,
+        'is_following': lambda: user(2).is_following(user(users)),
+        'has_role': lambda: load_user(1).has_role('Admin'),
+        'make_tags existing': lambda: make_tags('tag1, tag2, tag3'),
+        'make_tags new': make_new_tags,
+        'load_user cached': lambda: load_user(2),
+        'load_user missed': load_user_missed,
+    }
+
+
+def run(size: Dict[str, int], repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, func in hot_paths(size).items():
+        def once():
+            try:
+                func()
+            finally:
+                # every run starts like a request: empty identity map, no transaction
+                db.session.rollback()
+                db.session.remove()
+        results[name] = measure(once, repeat=repeat)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float, floor: float) -> int:
+    """Prints the change of every timing against the baseline, returns the regressions."""
+
+    regressions = 0
+    for size, timings in results.items():
+        for name, timing in timings.items():
+            before = baseline.get(size, {}).get(name)
+            if before is None:
+                continue
+            now, then = timing['median_ms'], before['median_ms']
+            slower = now > then * (1 + tolerance) and now - then > floor
+            regressions += slower
+            print(f'{size:>8} {name:<20} {then:>10.3f} {now:>10.3f} '
+                  f'{(now / then - 1) * 100 if then else 0:>+8.1f}%{"  REGRESSION" if slower else ""}')
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                        help='Numbers of posts, the other tables are scaled along')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare with the results in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Relative slowdown of a median counted as a regression')
+    parser.add_argument('--floor', type=float, default=0.05,
+                        help='Slowdowns under this many milliseconds are noise')
+    args = parser.parse_args()
+
+    app = make_app()
+    results = {}
+    with app.app_context():
+        for posts in args.sizes:
+            size = scale(posts)
+            reset()
+            seed(**size, rng=random.Random(args.seed))
+            results[str(posts)] = run(size, args.repeat)
+
+    print(f'{"size":>8} {"path":<20} {"median ms":>10} {"p95 ms":>10}')
+    for size, timings in results.items():
+        for name, timing in timings.items():
+            print(f'{size:>8} {name:<20} {timing["median_ms"]:>10.3f} {timing["p95_ms"]:>10.3f}')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'meta': {
+                    'date': datetime.now().isoformat(timespec='seconds'),
+                    'python': platform.python_version(),
+                    'sqlite': sqlite3.sqlite_version,
+                    'repeat': args.repeat,
+                    'seed': args.seed
+                },
+                'results': results
+            }, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+        print(f'\n{"size":>8} {"path":<20} {"before ms":>10} {"after ms":>10} {"change":>9}')
+        if regressions := compare(results, baseline, args.tolerance, args.floor):
+            print(f'{regressions} regressions', file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
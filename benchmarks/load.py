@@ -0,0 +1,291 @@
+"""
+
+Replays weighted user journeys against the whole application, served by
+a local multi-threaded WSGI server, and reports the throughput and the
+latency percentiles of every endpoint:
+
+    python -m benchmarks.load --clients 16 --duration 60 --posts 10000
+
+Every client signs in as a seeded user, then picks journeys at random
+according to 'JOURNEYS': browsing, searching, paginating deep, writing
+posts, following users, or signing up a new account, activated through
+the link mailed to a local mail sink.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import re
+import sys
+import json
+import random
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from http.cookiejar import CookieJar
+from time import monotonic, perf_counter
+from typing import Dict, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, build_opener
+
+from werkzeug.serving import make_server
+
+from . import make_app
+from .dataset import PASSWORD, Zipf, reset, scale, seed, words
+from app.testing import MailSink
+
+# journey -> weight
+JOURNEYS = {
+    'home': 30,
+    'read': 20,
+    'search': 15,
+    'paginate_deep': 10,
+    'create_post': 8,
+    'follow': 7,
+    'login': 5,
+    'register': 5,
+}
+
+CSRF_RE = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+TOKEN_RE = re.compile(r'/activate_account/([\w.\-]+)')
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    # every hop is measured on its own, journeys know where they go next
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Recorder:
+    """Collects the latencies of the requests made after the warm-up."""
+
+    def __init__(self, warmup: float):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.start = monotonic() + warmup
+        self.end = None
+
+    def record(self, label: str, milliseconds: float, ok: bool) -> None:
+        if monotonic() < self.start:
+            return
+        with self.lock:
+            if ok:
+                self.latencies[label].append(milliseconds)
+            else:
+                self.errors[label] += 1
+
+    def report(self) -> Dict[str, dict]:
+        elapsed = (self.end or monotonic()) - self.start
+
+        def percentile(values, rank):
+            return values[min(len(values) - 1, int(len(values) * rank))] if values else None
+
+        report = {}
+        with self.lock:
+            labels = set(self.latencies) | set(self.errors)
+            everything = sorted(value for values in self.latencies.values() for value in values)
+            for label in sorted(labels, key=lambda label: -len(self.latencies[label])):
+                values = sorted(self.latencies[label])
+                report[label] = {
+                    'requests': len(values),
+                    'errors': self.errors[label],
+                    'rps': len(values) / elapsed,
+                    'p50_ms': percentile(values, 0.50),
+                    'p95_ms': percentile(values, 0.95),
+                    'p99_ms': percentile(values, 0.99),
+                }
+            report['total'] = {
+                'requests': len(everything),
+                'errors': sum(self.errors.values()),
+                'rps': len(everything) / elapsed,
+                'p50_ms': percentile(everything, 0.50),
+                'p95_ms': percentile(everything, 0.95),
+                'p99_ms': percentile(everything, 0.99),
+            }
+        return report
+
+
+class Client:
+    """A browser session: its own cookies, requests timed under a label."""
+
+    def __init__(self, base: str, recorder: Recorder):
+        self.base = base
+        self.recorder = recorder
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()), _NoRedirect())
+
+    def request(self, label: str, path: str, fields: Optional[dict] = None,
+                expect: Tuple[int, ...] = ()) -> Tuple[int, str]:
+        """Requests 'path', by POST if there are 'fields'; fails on errors or unexpected statuses."""
+
+        data = urlencode(fields).encode('utf-8') if fields is not None else None
+        start = perf_counter()
+        try:
+            with self.opener.open(self.base + path, data, timeout=30) as response:
+                status, body = response.status, response.read()
+        except HTTPError as error:
+            status, body = error.code, error.read()
+        except URLError:
+            status, body = 0, b''
+        ok = status in expect if expect else 0 < status < 400
+        self.recorder.record(label, (perf_counter() - start) * 1000, ok)
+        return status, body.decode('utf-8', 'replace')
+
+    def submit(self, label: str, path: str, fields: dict,
+               form: Optional[str] = None, form_label: Optional[str] = None) -> int:
+        """
+        Fetches the form on 'form' (or 'path') for its CSRF token, then
+        posts it. Forms redisplayed with errors count as failures.
+        """
+
+        form_label = form_label or 'GET ' + label.split(' ', 1)[1]
+        _, page = self.request(form_label, form or path)
+        token = CSRF_RE.search(page)
+        status, _ = self.request(label, path, {**fields, 'csrf_token': token.group(1) if token else ''},
+                                 expect=(302, 303))
+        return status
+
+
+class VirtualUser:
+    def __init__(self, number: int, base: str, recorder: Recorder, sink: MailSink,
+                 size: Dict[str, int], rng: random.Random):
+        self.number = number
+        self.base = base
+        self.recorder = recorder
+        self.sink = sink
+        self.size = size
+        self.rng = rng
+        self.users, self.tags = Zipf(size['users']), Zipf(size['tags'])
+        self.signups = 0
+        self.client = Client(base, recorder)
+        self.email = None
+
+    def run(self, deadline: float) -> None:
+        self.login()
+        names, weights = zip(*JOURNEYS.items())
+        while monotonic() < deadline:
+            getattr(self, self.rng.choices(names, weights)[0])()
+
+    def login(self, email: Optional[str] = None) -> None:
+        self.client = Client(self.base, self.recorder)
+        self.email = email or f'user{self.users.sample(self.rng, 1)[0]}@example.com'
+        self.client.submit('POST /login', '/login', {'email': self.email, 'password': PASSWORD})
+
+    def register(self) -> None:
+        self.signups += 1
+        username = f'load{self.number}x{self.signups}x{self.rng.randrange(10 ** 6)}'
+        email = f'{username}@example.com'
+        self.client = Client(self.base, self.recorder)
+        self.client.submit('POST /register', '/register', {
+            'username': username, 'email': email, 'password': PASSWORD, 'confirm': PASSWORD
+        })
+
+        message = self.sink.wait_for_recipient(email, timeout=10)
+        token = None
+        for part in message.walk() if message else ():
+            if part.get_content_type() == 'text/html':
+                token = TOKEN_RE.search(part.get_payload(decode=True).decode('utf-8', 'replace'))
+        if token is None:
+            self.recorder.record('GET /activate_account/<token>', 0.0, False)
+        else:
+            self.client.request('GET /activate_account/<token>', f'/activate_account/{token.group(1)}')
+        self.login(email)
+
+    def home(self) -> None:
+        self.client.request('GET /home', '/home')
+
+    def read(self) -> None:
+        self.client.request('GET /posts/<id>', f'/posts/{self.rng.randint(1, self.size["posts"])}')
+
+    def search(self) -> None:
+        query = words(self.rng, self.rng.randint(1, 2))
+        self.client.request('GET /index?query=', '/index?' + urlencode({'query': query}))
+
+    def paginate_deep(self) -> None:
+        page = self.rng.randint(self.size['posts'] // 10, self.size['posts'] // 5)
+        self.client.request('GET /index?page=', f'/index?page={page}')
+
+    def create_post(self) -> None:
+        tags = [f'tag{tag_id}' for tag_id in self.tags.sample(self.rng, 2)]
+        tags.append(f'new{self.rng.randrange(10 ** 4)}')
+        self.client.submit('POST /posts/create', '/posts/create', {
+            'title': words(self.rng, 6),
+            'content': f'<p>{words(self.rng, 80)}</p>',
+            'tags': ', '.join(tags)
+        })
+
+    def follow(self) -> None:
+        username = f'user{self.users.sample(self.rng, 1)[0]}'
+        self.client.submit('POST /follow/<username>', f'/follow/{username}', {},
+                           form=f'/users/{username}', form_label='GET /users/<username>')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds measured')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds run before measuring')
+    parser.add_argument('--posts', type=int, default=2000, help='Size of the seeded dataset')
+    parser.add_argument('--bcrypt-rounds', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the report to this JSON file')
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    with MailSink() as sink:
+        app = make_app(
+            HASHING_ROUNDS=args.bcrypt_rounds,
+            LOGGING_LEVEL=logging.INFO,
+            MAIL_SERVER=sink.host,
+            MAIL_PORT=sink.port,
+            MAIL_USE_TLS=False,
+            MAIL_USE_SSL=False,
+            MAIL_SUPPRESS_SEND=False,
+            MAIL_DEBUG=False,
+            MAIL_USERNAME='load',
+            MAIL_PASSWORD=None
+        )
+        size = scale(args.posts)
+        with app.app_context():
+            reset()
+            seed(**size, rng=random.Random(args.seed))
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, name='load-server', daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_port}'
+
+        recorder = Recorder(args.warmup)
+        deadline = monotonic() + args.warmup + args.duration
+        clients = [
+            threading.Thread(target=VirtualUser(
+                number, base, recorder, sink, size, random.Random(args.seed * 1000 + number)
+            ).run, args=(deadline,), name=f'client-{number}')
+            for number in range(args.clients)
+        ]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        recorder.end = monotonic()
+        server.shutdown()
+
+    report = recorder.report()
+    print(f'{"endpoint":<32} {"requests":>9} {"errors":>7} {"req/s":>8} '
+          f'{"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+    for label, row in report.items():
+        latencies = ' '.join(f'{row[key]:>8.1f}' if row[key] is not None else f'{"-":>8}'
+                             for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+        print(f'{label:<32} {row["requests"]:>9} {row["errors"]:>7} {row["rps"]:>8.1f} {latencies}')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'settings': vars(args), 'report': report}, file, indent=2)
+    return 1 if report['total']['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+
+Checks that post listings issue a bounded number of queries, no matter
+how many posts, authors and tags a page shows:
+
+    python -m benchmarks.queries
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+from . import make_app
+from app.extensions import db
+from app.models import User, Post, Tag, Followers, PostTag, recount_users
+from app.testing import assert_max_queries, login
+from app import timeline
+from app.search import search_index
+
+# Endpoint -> maximum number of queries per page for a signed in user
+BUDGETS = {
+    '/index': 3,
+    '/index?query=lorem': 3,
+    '/tags/1': 4,
+    '/users/user1/posts': 4,
+    '/home': 4,
+}
+
+
+def seed(users: int = 10, posts: int = 50, tags: int = 5) -> None:
+    db.session.execute(User.__table__.insert(), [{
+        'username': f'user{number}',
+        'email': f'user{number}@example.com',
+        'image_file': 'default.jpg',
+        'password_hash': '-'
+    } for number in range(1, users + 1)])
+    db.session.execute(Tag.__table__.insert(), [
+        {'name': f'tag{number}'} for number in range(1, tags + 1)
+    ])
+    start = datetime.now()
+    db.session.execute(Post.__table__.insert(), [{
+        'title': f'Lorem ipsum {number}',
+        'content': '<p>Lorem ipsum dolor sit amet</p>',
+        'date': start - timedelta(minutes=number),
+        'user_id': number % users + 1
+    } for number in range(posts)])
+    db.session.execute(PostTag.insert(), [
+        {'post_id': post_id, 'tag_id': tag_id}
+        for post_id in range(1, posts + 1) for tag_id in range(1, tags + 1)
+    ])
+    db.session.execute(Followers.insert(), [
+        {'follower_id': 1, 'followed_id': followed_id} for followed_id in range(2, users + 1)
+    ])
+    db.session.execute(recount_users())
+    for user_id in range(1, users + 1):
+        timeline.rebuild(user_id)
+    db.session.commit()
+    search_index.rebuild()
+
+
+def main() -> int:
+    failures = 0
+    app = make_app()
+    with app.app_context():
+        seed()
+        client = app.test_client()
+        login(client, user_id=1)
+        for mode in ('offset', 'keyset'):
+            app.config['PAGINATION_MODE'] = mode
+            # warm up the search index and other lazily built state
+            for url in BUDGETS:
+                client.get(url)
+            for url, maximum in BUDGETS.items():
+                try:
+                    assert_max_queries(client, url, maximum)
+                except AssertionError as error:
+                    failures += 1
+                    print(f'FAIL [{mode}] {error}', file=sys.stderr)
+                else:
+                    print(f'ok   [{mode}] {url}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+
+Compares the search index with the LIKE scan it replaced:
+
+    python -m benchmarks.search --posts 20000 --repeat 30
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   October, 2026
+
+"""
+
+import random
+import argparse
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from . import make_app, measure
+from app.extensions import db
+from app.models import User, Post
+from app.search import search_index
+
+QUERIES = ['lorem', 'ipsum dolor', 'consectetur adipiscing elit', 'zzzz']
+
+
+def words(rng: random.Random, count: int) -> str:
+    vocabulary = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do '
+                  'eiusmod tempor incididunt ut labore et dolore magna aliqua').split()
+    vocabulary += [f'word{number}' for number in range(5000)]
+    return ' '.join(rng.choice(vocabulary) for _ in range(count))
+
+
+def seed(posts: int, rng: random.Random) -> None:
+    db.session.execute(User.__table__.insert(), {
+        'username': 'bench',
+        'email': 'bench@example.com',
+        'image_file': 'default.jpg',
+        'password_hash': '-'
+    })
+    start = datetime.now()
+    for offset in range(0, posts, 1000):
+        db.session.execute(Post.__table__.insert(), [{
+            'title': words(rng, 6),
+            'content': f'<p>{words(rng, 150)}</p>',
+            'date': start - timedelta(minutes=number),
+            'user_id': 1
+        } for number in range(offset, min(posts, offset + 1000))])
+    db.session.commit()
+
+
+def like(query: str) -> list:
+    posts = Post.query.filter(Post.title.contains(query) | Post.content.contains(query))
+    return posts.order_by(Post.date.desc()).limit(5).all()
+
+
+def indexed(query: str) -> list:
+    return search_index.filter(Post.query, query, scoped=False).order_by(Post.date.desc()).limit(5).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed(args.posts, random.Random(args.seed))
+
+        print(f'{"path":<8} {"query":<30} {"median ms":>10} {"p95 ms":>10}')
+        for backend in ('like', 'fts5', 'memory'):
+            if backend != 'like':
+                current_app.config['SEARCH_BACKEND'] = backend
+                search_index.init_app(current_app)
+                search_index.rebuild()
+            for query in QUERIES:
+                func = like if backend == 'like' else indexed
+                timing = measure(lambda: func(query), repeat=args.repeat)
+                print(f'{backend:<8} {query:<30} {timing["median_ms"]:>10.2f} {timing["p95_ms"]:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
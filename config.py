@@ -1,5 +1,4 @@
 import os
-import logging
 
 from dotenv import load_dotenv
 
@@ -11,16 +10,39 @@ load_dotenv(os.path.join(BASE_DIR, '.env'))
 class BaseConfig:
     """Flask configuration variables from .env file."""
 
-    # Logging settings:
-    LOGGING_LEVEL = logging.DEBUG
+    # Logging settings, records are written by a background thread (the
+    # file holds JSON lines unless LOGGING_JSON is False, queued records
+    # beyond LOGGING_QUEUE_SIZE are dropped, one DEBUG record in
+    # LOGGING_DEBUG_SAMPLE of a line is kept, and a failure is mailed at
+    # most once per LOGGING_MAIL_INTERVAL seconds, with at most
+    # LOGGING_MAIL_PER_HOUR emails an hour per process, so a server
+    # running several worker processes sends up to that many times more):
+    LOGGING_LEVEL = os.environ.get('LOGGING_LEVEL', 'INFO')
     LOGGING_FORMAT = '%(asctime)s %(levelname)s: %(message)s ' \
                      '[in %(pathname)s:%(lineno)d]'
     LOGGING_LOCATION = os.path.join(BASE_DIR, 'logs', 'app.log')
+    LOGGING_MAX_BYTES = 10 * 1024 * 1024
+    LOGGING_BACKUP_COUNT = 10
+    LOGGING_JSON = True
+    LOGGING_QUEUE_SIZE = 10000
+    LOGGING_DEBUG_SAMPLE = 10
+    LOGGING_MAIL_INTERVAL = 600
+    LOGGING_MAIL_PER_HOUR = 10
 
     # Flask settings:
     SECRET_KEY = os.environ.get('SECRET_KEY')
     DEBUG = True
     THREADS_PER_PAGE = 2
+    MAX_CONTENT_LENGTH = 8 * 1024 * 1024
+
+    # Password hashing, the bcrypt work factor is calibrated by every
+    # process to take about BCRYPT_TARGET_MS milliseconds unless
+    # HASHING_ROUNDS is set, set it when processes should agree:
+    HASHING_ROUNDS = None
+    BCRYPT_TARGET_MS = 250
+    HASHING_WORKERS = 4
+    HASHING_QUEUE_SIZE = 16
+    HASHING_QUEUE_TIMEOUT = 5.0
 
     # Flask-SQLAlchemy settings:
     SQLALCHEMY_DATABASE_URI = os.environ.get(
@@ -29,6 +51,67 @@ class BaseConfig:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Listings pagination ('offset' or 'keyset'):
+    PAGINATION_MODE = os.environ.get('PAGINATION_MODE', 'offset')
+
+    # Home timeline settings, users following more people are served
+    # by fan-out-on-read:
+    TIMELINE_MAX_FOLLOWING = 1000
+
+    # Seconds a process may keep the role name -> id map:
+    ROLES_CACHE_TTL = 300
+
+    # Cache of authenticated users (entries per process and seconds):
+    IDENTITY_CACHE_SIZE = 1024
+    IDENTITY_CACHE_TTL = 60
+
+    # Buffered 'User.last_seen' writes (seconds and pending users):
+    LAST_SEEN_FLUSH_INTERVAL = 60
+    LAST_SEEN_FLUSH_SIZE = 500
+
+    # Cache of rendered post blocks (entries and bytes per process):
+    FRAGMENT_CACHE_SIZE = 10000
+    FRAGMENT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+    # Cache of tag name -> id (entries per process and seconds):
+    TAG_CACHE_SIZE = 4096
+    TAG_CACHE_TTL = 300
+
+    # Per-request SQL instrumentation (statements repeated this many times
+    # are reported as N+1, endpoints summarize their last requests):
+    SQL_STATS_ENABLED = True
+    SQL_STATS_REPEAT_THRESHOLD = 3
+    SQL_STATS_SLOW_MS = 100
+    SQL_STATS_WINDOW = 100
+
+    # Characters of text shown by listings for every post:
+    EXCERPT_LENGTH = 300
+
+    # New posts pushed to listings (Server-Sent Events, or polling every
+    # LIVE_POLL_INTERVAL seconds without them; the newest post id is read
+    # from the database at most every LIVE_REFRESH_INTERVAL seconds; pages
+    # with more than LIVE_MAX_POSTS new posts are asked to reload):
+    LIVE_SSE_ENABLED = True
+    LIVE_REFRESH_INTERVAL = 5
+    LIVE_HEARTBEAT = 15
+    LIVE_STREAM_TIMEOUT = 300
+    LIVE_POLL_INTERVAL = 20
+    LIVE_MAX_POSTS = 20
+
+    # Atom feeds (posts per feed, seconds clients may keep one, cached
+    # feeds and bytes per process):
+    FEED_SIZE = 20
+    FEED_MAX_AGE = 60
+    FEED_CACHE_SIZE = 1024
+    FEED_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+    # Rows read per round trip by 'flask export' and the admin export:
+    EXPORT_CHUNK_SIZE = 1000
+
+    # Search settings ('auto', 'fts5' or 'memory'):
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+    SEARCH_MAX_RESULTS = 500
+
     # Flask-Mail SMTP server settings:
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT'))
@@ -36,12 +119,32 @@ class BaseConfig:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
 
+    # Outbox delivering mail (queued messages, workers, messages per SMTP
+    # connection, retries and first retry delay in seconds):
+    MAIL_OUTBOX_SIZE = 1000
+    MAIL_OUTBOX_WORKERS = 2
+    MAIL_OUTBOX_BATCH = 20
+    MAIL_OUTBOX_RETRIES = 3
+    MAIL_OUTBOX_BACKOFF = 1.0
+
+    # Profile pictures, uploads wait in the spool until processed and
+    # bigger images are rejected; the spool is searched every
+    # PICTURES_RECOVER_INTERVAL seconds for uploads left behind, and for
+    # claimed ones unfinished after PICTURES_STALE_AFTER seconds:
+    PICTURES_SPOOL_DIR = os.path.join(BASE_DIR, 'spool', 'pictures')
+    PICTURES_MAX_PIXELS = 25_000_000
+    PICTURES_RECOVER_INTERVAL = 300
+    PICTURES_STALE_AFTER = 600
+
     # Flask-CKEditor settings:
     CKEDITOR_SERVE_LOCAL = True
     CKEDITOR_PKG_TYPE = 'standard'
     CKEDITOR_ENABLE_CODESNIPPET = True
     CKEDITOR_CODE_THEME = 'github'
 
+    # Pygments style of the code highlighted in posts:
+    HIGHLIGHT_STYLE = 'default'
+
     # Admin settings:
     ADMIN_USERNAME = 'Admin'
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL')
@@ -0,0 +1,28 @@
+"""Added post updated_at
+
+Revision ID: 7d5a3e9c18f2
+Revises: c41e8b0f6d27
+Create Date: 2026-10-18 14:26:05.718302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d5a3e9c18f2'
+down_revision = 'c41e8b0f6d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('post', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE post SET updated_at = date')
+    with op.batch_alter_table('post') as batch_op:
+        batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('post') as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,27 @@
+"""Added post excerpt
+
+Revision ID: a6c1e5f9b372
+Revises: f4a8d2c6b931
+Create Date: 2026-10-18 16:14:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c1e5f9b372'
+down_revision = 'f4a8d2c6b931'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # filled by 'flask build-excerpts', listings show the content meanwhile
+    with op.batch_alter_table('post') as batch_op:
+        batch_op.add_column(sa.Column('excerpt', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('post') as batch_op:
+        batch_op.drop_column('excerpt')
@@ -0,0 +1,27 @@
+"""Added post content html
+
+Revision ID: b9d4f7a2c815
+Revises: a6c1e5f9b372
+Create Date: 2026-10-18 16:21:09.774310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d4f7a2c815'
+down_revision = 'a6c1e5f9b372'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # filled by 'flask render-posts', posts show their content meanwhile
+    with op.batch_alter_table('post') as batch_op:
+        batch_op.add_column(sa.Column('content_html', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('post') as batch_op:
+        batch_op.drop_column('content_html')
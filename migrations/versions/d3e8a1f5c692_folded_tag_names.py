@@ -0,0 +1,54 @@
+"""Folded tag names
+
+Revision ID: d3e8a1f5c692
+Revises: b9d4f7a2c815
+Create Date: 2026-10-18 16:48:27.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3e8a1f5c692'
+down_revision = 'b9d4f7a2c815'
+branch_labels = None
+depends_on = None
+
+
+def _normalize(name):
+    # as 'Tag.normalize' at this revision
+    return ' '.join(name.split()).casefold()[:64]
+
+
+def upgrade():
+    """Renames the tags to their normalized name, merging the ones sharing it into the oldest."""
+
+    tag = sa.table('tag', sa.column('id'), sa.column('name'))
+    post_tag = sa.table('post_tag', sa.column('post_id'), sa.column('tag_id'))
+    connection = op.get_bind()
+
+    kept = {}
+    for tag_id, name in connection.execute(sa.select([tag.c.id, tag.c.name]).order_by(tag.c.id)).fetchall():
+        normalized = _normalize(name)
+        if normalized not in kept:
+            kept[normalized] = tag_id
+            continue
+        target = kept[normalized]
+        tagged = {post_id for post_id, in connection.execute(
+            sa.select([post_tag.c.post_id]).where(post_tag.c.tag_id == target))}
+        moved = [{'post_id': post_id, 'tag_id': target} for post_id, in connection.execute(
+            sa.select([post_tag.c.post_id]).where(post_tag.c.tag_id == tag_id)) if post_id not in tagged]
+        connection.execute(post_tag.delete().where(post_tag.c.tag_id == tag_id))
+        if moved:
+            connection.execute(post_tag.insert(), moved)
+        connection.execute(tag.delete().where(tag.c.id == tag_id))
+
+    for normalized, tag_id in kept.items():
+        connection.execute(tag.update().where(tag.c.id == tag_id).where(
+            tag.c.name != normalized).values(name=normalized))
+
+
+def downgrade():
+    # merged tags cannot be told apart again
+    pass
@@ -0,0 +1,44 @@
+"""Added user counters
+
+Revision ID: e1b7c3a9d054
+Revises: 7d5a3e9c18f2
+Create Date: 2026-10-18 15:48:12.204117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b7c3a9d054'
+down_revision = '7d5a3e9c18f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(sa.Column('followers_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('following_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('posts_count', sa.Integer(), server_default='0', nullable=False))
+    # built with the dialect's quoting, 'user' is reserved on some databases
+    user = sa.table('user', sa.column('id'), sa.column('followers_count'),
+                    sa.column('following_count'), sa.column('posts_count'))
+    followers = sa.table('followers', sa.column('follower_id'), sa.column('followed_id'))
+    post = sa.table('post', sa.column('user_id'))
+
+    def count(column):
+        return sa.select([sa.func.count()]).where(column == user.c.id).as_scalar()
+
+    op.execute(user.update().values(
+        followers_count=count(followers.c.followed_id),
+        following_count=count(followers.c.follower_id),
+        posts_count=count(post.c.user_id)
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('posts_count')
+        batch_op.drop_column('following_count')
+        batch_op.drop_column('followers_count')
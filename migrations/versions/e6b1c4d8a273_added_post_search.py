@@ -0,0 +1,35 @@
+"""Added post search
+
+Revision ID: e6b1c4d8a273
+Revises: d3e8a1f5c692
+Create Date: 2026-10-18 17:12:40.518263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b1c4d8a273'
+down_revision = 'd3e8a1f5c692'
+branch_labels = None
+depends_on = None
+
+
+def _fts5():
+    connection = op.get_bind()
+    if connection.dialect.name != 'sqlite':
+        return False
+    return any(option == 'ENABLE_FTS5' for option, in connection.execute(sa.text('PRAGMA compile_options')))
+
+
+def upgrade():
+    # filled by 'flask reindex'; other databases search in memory
+    if _fts5():
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS post_search "
+                   "USING fts5(title, content, prefix='2 3')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS post_search')
@@ -0,0 +1,76 @@
+"""Added association keys and post indexes
+
+Revision ID: f4a8d2c6b931
+Revises: e1b7c3a9d054
+Create Date: 2026-10-18 16:05:41.532870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a8d2c6b931'
+down_revision = 'e1b7c3a9d054'
+branch_labels = None
+depends_on = None
+
+# table -> (primary key columns, reverse index name)
+ASSOCIATIONS = {
+    'followers': (['follower_id', 'followed_id'], 'ix_followers_followed_follower'),
+    'user_role': (['user_id', 'role_id'], 'ix_user_role_role_user'),
+    'post_tag': (['post_id', 'tag_id'], 'ix_post_tag_tag_post'),
+}
+
+
+def _deduplicate(table, columns):
+    """Deletes incomplete and repeated rows, which would violate the new keys."""
+
+    first, second = columns
+    op.execute(f'DELETE FROM {table} WHERE {first} IS NULL OR {second} IS NULL')
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(f'DELETE FROM {table} WHERE rowid NOT IN '
+                   f'(SELECT min(rowid) FROM {table} GROUP BY {first}, {second})')
+    elif dialect == 'postgresql':
+        op.execute(f'DELETE FROM {table} a USING {table} b WHERE a.ctid > b.ctid '
+                   f'AND a.{first} = b.{first} AND a.{second} = b.{second}')
+
+
+def _recount_follows():
+    """The follow counters were backfilled before duplicated follows were deleted."""
+
+    user = sa.table('user', sa.column('id'), sa.column('followers_count'), sa.column('following_count'))
+    followers = sa.table('followers', sa.column('follower_id'), sa.column('followed_id'))
+
+    def count(column):
+        return sa.select([sa.func.count()]).where(column == user.c.id).as_scalar()
+
+    op.execute(user.update().values(
+        followers_count=count(followers.c.followed_id),
+        following_count=count(followers.c.follower_id)
+    ))
+
+
+def upgrade():
+    for table, (columns, index) in ASSOCIATIONS.items():
+        _deduplicate(table, columns)
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, existing_type=sa.Integer(), nullable=False)
+            batch_op.create_primary_key(f'pk_{table}', columns)
+            batch_op.create_index(index, columns[::-1], unique=False)
+    _recount_follows()
+
+    op.create_index('ix_post_user_date_id', 'post', ['user_id', 'date', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_post_user_date_id', table_name='post')
+
+    for table, (columns, index) in ASSOCIATIONS.items():
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index(index)
+            batch_op.drop_constraint(f'pk_{table}', type_='primary')
+            for column in columns:
+                batch_op.alter_column(column, existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,36 @@
+"""
+
+Defines the application shared by the tests. Run them from the
+repository root with 'python -m unittest discover -s tests -t .' or
+'python -m pytest tests'.
+
+The admin views only allow a single application per process, so every
+test module uses the one returned by 'get_app', bound to a temporary
+SQLite database and delivering mail to a local sink.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   -
+
+"""
+
+from benchmarks import make_app
+from app.testing import MailSink
+
+sink = MailSink()
+_app = None
+
+
+def get_app():
+    global _app
+    if _app is None:
+        sink.start()
+        _app = make_app(
+            MAIL_SERVER=sink.host,
+            MAIL_PORT=sink.port,
+            MAIL_USE_TLS=False,
+            MAIL_USERNAME='educatia',
+            MAIL_PASSWORD=None,
+            MAIL_SUPPRESS_SEND=False
+        )
+    return _app
@@ -0,0 +1,117 @@
+"""
+
+Checks that the outbox delivers mail to a local sink, retries the
+messages failing to send and drops messages once full.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   -
+
+"""
+
+import socket
+import unittest
+from time import monotonic, sleep
+
+from flask_mail import Message
+
+from . import get_app, sink
+from app.outbox import outbox, _Outbox
+
+SENDER = 'educatia@example.com'
+
+
+def closed_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def message(recipient: str, subject: str = 'Hello') -> Message:
+    return Message(subject, sender=SENDER, recipients=[recipient], body='Hello')
+
+
+class OutboxTest(unittest.TestCase):
+    settings = {
+        'MAIL_OUTBOX_SIZE': 100,
+        'MAIL_OUTBOX_WORKERS': 2,
+        'MAIL_OUTBOX_BATCH': 5,
+        'MAIL_OUTBOX_RETRIES': 2,
+        'MAIL_OUTBOX_BACKOFF': 0.05
+    }
+
+    def setUp(self):
+        self.app = get_app()
+        self.context = self.app.app_context()
+        self.context.push()
+        self.saved = {key: self.app.config[key] for key in self.settings}
+        self.app.config.update(self.settings)
+        self.shared = self.app.extensions['outbox']
+        self.box = self.app.extensions['outbox'] = _Outbox(self.app)
+
+    def tearDown(self):
+        self.box.close(timeout=1.0)
+        self.app.extensions['outbox'] = self.shared
+        self.app.config.update(self.saved)
+        self.app.extensions['mail'].port = sink.port
+        self.context.pop()
+
+    def wait_for_stats(self, sent: int, failed: int = 0, timeout: float = 5.0) -> dict:
+        deadline = monotonic() + timeout
+        while True:
+            stats = outbox.stats
+            if (stats['sent'], stats['failed']) == (sent, failed) or monotonic() > deadline:
+                return stats
+            sleep(0.02)
+
+    def test_delivers_messages(self):
+        recipients = [f'deliver{number}@example.com' for number in range(12)]
+        for recipient in recipients:
+            self.assertTrue(outbox.send(message(recipient)))
+        for recipient in recipients:
+            self.assertIsNotNone(sink.wait_for_recipient(recipient), recipient)
+        stats = self.wait_for_stats(sent=len(recipients))
+        self.assertEqual((stats['sent'], stats['failed'], stats['depth']), (len(recipients), 0, 0))
+        self.assertIsNotNone(stats['latency_p95'])
+
+    def test_retries_when_the_server_is_down(self):
+        self.app.extensions['mail'].port = closed_port()
+        self.assertTrue(outbox.send(message('retry@example.com')))
+        sleep(0.02)
+        self.app.extensions['mail'].port = sink.port
+        self.assertIsNotNone(sink.wait_for_recipient('retry@example.com'))
+        self.assertEqual(self.wait_for_stats(sent=1)['failed'], 0)
+
+    def test_drops_after_the_last_retry(self):
+        self.app.extensions['mail'].port = closed_port()
+        self.assertTrue(outbox.send(message('never@example.com')))
+        stats = self.wait_for_stats(sent=0, failed=1)
+        self.assertEqual((stats['sent'], stats['failed']), (0, 1))
+
+    def test_retries_only_the_failing_message(self):
+        self.app.config['MAIL_OUTBOX_WORKERS'] = 1
+        self.box = self.app.extensions['outbox'] = _Outbox(self.app)
+        # a header with a line break fails before anything is sent
+        batch = [message('before@example.com'), message('bad@example.com', 'Hello\nBcc: x@example.com'),
+                 message('after@example.com')]
+        for item in batch:
+            self.assertTrue(outbox.send(item))
+        self.assertIsNotNone(sink.wait_for_recipient('before@example.com'))
+        self.assertIsNotNone(sink.wait_for_recipient('after@example.com'))
+        stats = self.wait_for_stats(sent=2, failed=1)
+        self.assertEqual((stats['sent'], stats['failed']), (2, 1))
+        # the worker survived the failure
+        self.assertTrue(outbox.send(message('later@example.com')))
+        self.assertIsNotNone(sink.wait_for_recipient('later@example.com'))
+
+    def test_drops_messages_when_full(self):
+        self.app.config.update(MAIL_OUTBOX_SIZE=2, MAIL_OUTBOX_WORKERS=0)
+        self.box = self.app.extensions['outbox'] = _Outbox(self.app)
+        self.assertTrue(outbox.send(message('full1@example.com')))
+        self.assertTrue(outbox.send(message('full2@example.com')))
+        self.assertFalse(outbox.send(message('full3@example.com')))
+        self.assertEqual(outbox.stats['depth'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+
+Checks that post listings issue a bounded number of queries, whatever
+the number of posts, authors and tags a page shows.
+
+Author:     Aleksandr Tolstoy <aleksandr13tolstoy@gmail.com>
+Created:    October, 2026
+Modified:   -
+
+"""
+
+import unittest
+
+from . import get_app
+from benchmarks.queries import BUDGETS, seed
+from app.extensions import db
+from app.models import User
+from app.testing import assert_max_queries, login
+
+
+class ListingQueryBudgetTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = get_app()
+        cls.context = cls.app.app_context()
+        cls.context.push()
+        if not User.query.filter_by(username='user1').count():
+            seed()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.session.remove()
+        cls.context.pop()
+
+    def setUp(self):
+        self.client = self.app.test_client()
+        login(self.client, user_id=1)
+
+    def tearDown(self):
+        self.app.config['PAGINATION_MODE'] = 'offset'
+
+    def check_budgets(self, mode: str) -> None:
+        self.app.config['PAGINATION_MODE'] = mode
+        # warm up the search index and other lazily built state
+        for url in BUDGETS:
+            self.client.get(url)
+        for url, maximum in BUDGETS.items():
+            with self.subTest(mode=mode, url=url):
+                response = assert_max_queries(self.client, url, maximum)
+                # an empty page would meet any budget
+                self.assertIn(b'Lorem ipsum', response.data)
+
+    def test_offset_pagination(self):
+        self.check_budgets('offset')
+
+    def test_keyset_pagination(self):
+        self.check_budgets('keyset')
+
+    def test_deep_pages(self):
+        self.app.config['PAGINATION_MODE'] = 'offset'
+        # pages not requested yet, once the signed in user is cached
+        self.client.get('/index')
+        pages = {
+            '/index?page=5': '/index',
+            '/tags/1?page=5': '/tags/1',
+            '/users/user2/posts': '/users/user1/posts',
+            '/home?page=5': '/home'
+        }
+        for url, budget in pages.items():
+            with self.subTest(url=url):
+                assert_max_queries(self.client, url, BUDGETS[budget])
+
+
+if __name__ == '__main__':
+    unittest.main()